@@ -1,22 +1,25 @@
 # =========================
 # app.py (Frontend UI)
 # =========================
-from datetime import datetime, timedelta
-import os
-import subprocess
-import pandas as pd
-import streamlit as st
-import matplotlib.pyplot as plt
-from prophet import Prophet
-from dotenv import load_dotenv
-
-# Import query handler (AI Assistant backend)
-from query_app import run_query, get_secret
+import startup_profiler
+from startup_profiler import step
+
+with step("streamlit, pandas", "import"):
+    from datetime import datetime, timedelta
+    import os
+    import subprocess
+    import pandas as pd
+    import streamlit as st
+
+# Page-specific modules (query_app → LangChain/Chroma, charts → matplotlib,
+# forecasting → Prophet) are imported inside their pages, so each page only
+# loads what it uses.
+from settings import get_secret
+from compaction import load_daily_sales, SUMMARY_FILE
 
 # =========================
 # 🔑 Secrets / API keys
 # =========================
-load_dotenv()
 GOOGLE_API_KEY = get_secret("GOOGLE_API_KEY")
 
 # Debug button for local/cloud key check
@@ -32,6 +35,18 @@ if st.sidebar.button("🔑 Test API Key"):
 DATA_FILE = "grocer_ai_data.csv"
 print("📂 Using data file:", DATA_FILE)
 
+@st.cache_data(max_entries=2, show_spinner=False)
+def load_transactions(version):
+    """Parsed CSV, cached per file version so reruns and pages share one read."""
+    data = pd.read_csv(DATA_FILE, parse_dates=["date_time"])
+    data["date"] = data["date_time"].dt.date
+    return data
+
+
+def data_file_version():
+    return os.path.getmtime(DATA_FILE) if os.path.exists(DATA_FILE) else 0
+
+
 # Ensure today's data exists
 def ensure_today_data():
     today = datetime.now().date()
@@ -40,8 +55,7 @@ def ensure_today_data():
     df = None
     if os.path.exists(DATA_FILE):
         try:
-            df = pd.read_csv(DATA_FILE, parse_dates=["date_time"])
-            df["date"] = df["date_time"].dt.date
+            df = load_transactions(data_file_version())
         except Exception as e:
             print("⚠️ Error loading dataset:", e)
 
@@ -50,12 +64,12 @@ def ensure_today_data():
         print("⚡ Generating fresh data for today...")
         subprocess.run(["python", "generate_data.py"])
 
-ensure_today_data()
+with step("ensure today's data"):
+    ensure_today_data()
 
 # 🔍 Debugging aid (optional: remove later)
 try:
-    df_check = pd.read_csv(DATA_FILE, parse_dates=["date_time"])
-    df_check["date"] = df_check["date_time"].dt.date
+    df_check = load_transactions(data_file_version())
     st.sidebar.write("📅 Dates available:", sorted(df_check["date"].unique())[-5:])
     st.sidebar.write("📅 Today is:", datetime.now().date())
 except Exception as e:
@@ -70,7 +84,12 @@ st.set_page_config(page_title="Grocer-AI Assistant", page_icon="🛒", layout="w
 # --- Sidebar Navigation ---
 # =========================
 st.sidebar.title("📊 Navigation")
-page = st.sidebar.radio("Go to", ["🤖 AI Assistant", "📊 Daily Dashboard", "🔮 Forecasts"])
+pages = ["🤖 AI Assistant", "📊 Daily Dashboard", "🔮 Forecasts"]
+# GROCER_START_PAGE (assistant / dashboard / forecasts) picks the landing page
+start_page = startup_profiler.PAGES.get(os.getenv("GROCER_START_PAGE", ""), pages[0])
+page = st.sidebar.radio("Go to", pages, index=pages.index(start_page))
+# Native Streamlit charts skip matplotlib entirely; otherwise rendered images are cached
+lightweight_charts = st.sidebar.checkbox("⚡ Lightweight charts", value=False, key="lightweight_charts")
 
 # =========================
 # 🤖 AI Assistant Page
@@ -79,8 +98,14 @@ if page == "🤖 AI Assistant":
     st.markdown("## 🤖 Grocer-AI Assistant")
     st.markdown("Ask me about **sales, employees, or company policies**!")
 
-    if "history" not in st.session_state:
-        st.session_state.history = []
+    with step("AI backend (query_app)", "import"):
+        from query_app import run_query
+    from session_memory import SessionMemory
+
+    # Bounded history (last 10 turns, docs kept as IDs) + per-session retrieval cache
+    if "memory" not in st.session_state:
+        st.session_state.memory = SessionMemory()
+    memory = st.session_state.memory
 
     user_question = st.text_input("Type your question here:", key="ai_question_input")
 
@@ -91,7 +116,7 @@ if page == "🤖 AI Assistant":
         clear = st.button("Clear", key="ai_clear")
 
     if clear:
-        st.session_state.history = []
+        memory.clear()
         st.experimental_rerun()
 
     if submit:
@@ -100,20 +125,21 @@ if page == "🤖 AI Assistant":
         else:
             with st.spinner("Thinking... 🤔"):
                 try:
-                    answer, retrieved_docs = run_query(user_question)
-                    st.session_state.history.append({"q": user_question, "a": answer, "docs": retrieved_docs})
+                    answer, retrieved_docs = run_query(user_question, session=memory)
+                    memory.add_turn(user_question, answer, retrieved_docs)
                 except Exception as e:
                     st.error(f"❌ AI Assistant error: {e}")
 
-    if st.session_state.history:
+    if memory.turns:
         st.markdown("---")
         st.subheader("Conversation history")
-        for item in reversed(st.session_state.history[-10:]):
+        for item in reversed(memory.turns):
             st.markdown(f"**Q:** {item['q']}")
             st.markdown(f"**A:** {item['a']}")
-            if item.get("docs"):
+            docs = memory.docs(item)
+            if docs:
                 st.markdown("**Retrieved docs (top 3):**")
-                for d in item["docs"][:3]:
+                for d in docs[:3]:
                     st.markdown(f"- {d}")
             st.markdown("---")
 
@@ -123,14 +149,18 @@ if page == "🤖 AI Assistant":
 elif page == "📊 Daily Dashboard":
     st.title("📊 Daily Sales Dashboard")
 
+    import charts
+
     try:
-        df = pd.read_csv(DATA_FILE, parse_dates=["date_time"])
-        df["date"] = pd.to_datetime(df["date_time"]).dt.date
+        with step("load dashboard data"):
+            df = load_transactions(data_file_version())
+        # Raw rows cover the recent window only; older days live in daily summaries
+        daily = load_daily_sales(df)
 
         # --- Sidebar filters ---
         st.sidebar.header("🔎 Filters")
-        start_date = st.sidebar.date_input("Start Date", df["date"].min(), key="sid_start")
-        end_date = st.sidebar.date_input("End Date", df["date"].max(), key="sid_end")
+        start_date = st.sidebar.date_input("Start Date", daily["date"].min(), key="sid_start")
+        end_date = st.sidebar.date_input("End Date", daily["date"].max(), key="sid_end")
 
         branches_all = sorted(df["branch_id"].unique().tolist())
         selected_branches = st.sidebar.multiselect(
@@ -177,24 +207,32 @@ elif page == "📊 Daily Dashboard":
 
         # --- Sales trend (7 days) ---
         st.subheader("📈 Sales Trend (Last 7 Days)")
-        last_7_days = filtered_df[filtered_df["date"] >= (filtered_df["date"].max() - pd.Timedelta(days=7))]
+        if search_product:
+            trend_df = filtered_df  # product names are only in the raw rows
+        else:
+            trend_df = daily[(daily["date"] >= start_date) & (daily["date"] <= end_date)]
+            if selected_branches:
+                trend_df = trend_df[trend_df["branch_id"].isin(selected_branches)]
+            if selected_categories:
+                trend_df = trend_df[trend_df["product_category"].isin(selected_categories)]
+        last_7_days = trend_df[trend_df["date"] >= (trend_df["date"].max() - pd.Timedelta(days=7))]
         sales_trend = last_7_days.groupby("date")["total_amount"].sum()
-        fig, ax = plt.subplots()
-        sales_trend.plot(kind="line", marker="o", ax=ax)
-        ax.set_ylabel("Sales ($)")
-        ax.set_title("Total Sales in Last 7 Days")
-        st.pyplot(fig)
+        if sales_trend.empty:
+            st.info("No sales match the current filters.")
+        elif lightweight_charts:
+            st.line_chart(sales_trend)
+        else:
+            charts.show(charts.line_chart(sales_trend, "Total Sales in Last 7 Days", "Sales ($)"))
 
         # --- Top categories today ---
         st.subheader("📊 Top 5 Categories Today")
         today_data = filtered_df[filtered_df["date"] == today]
         if not today_data.empty:
             top_categories = today_data.groupby("product_category")["total_amount"].sum().nlargest(5)
-            fig, ax = plt.subplots()
-            top_categories.plot(kind="bar", ax=ax, color="skyblue")
-            ax.set_ylabel("Sales ($)")
-            ax.set_title("Top 5 Product Categories Today")
-            st.pyplot(fig)
+            if lightweight_charts:
+                st.bar_chart(top_categories)
+            else:
+                charts.show(charts.bar_chart(top_categories, "Top 5 Product Categories Today", "Sales ($)"))
 
     except Exception as e:
         st.error(f"Dashboard error: {e}")
@@ -205,61 +243,91 @@ elif page == "📊 Daily Dashboard":
 elif page == "🔮 Forecasts":
     st.title("🔮 Sales Forecasts")
 
+    engine = st.sidebar.radio(
+        "Forecast engine", ["⚡ Fast (all series)", "🎯 Prophet (high accuracy)"], key="forecast_engine"
+    )
+    import charts
+    from forecasting import all_daily_series, forecast_all
+
     try:
-        df = pd.read_csv(DATA_FILE, parse_dates=["date_time"])
-        df["date"] = pd.to_datetime(df["date_time"]).dt.date
-
-        # --- Overall Forecast ---
-        st.subheader("📈 Overall Sales Forecast (Next 7 Days)")
-        daily_sales = df.groupby("date")["total_amount"].sum().reset_index()
-        daily_sales.columns = ["ds", "y"]
-
-        if len(daily_sales) > 10:
-            model = Prophet(daily_seasonality=True)
-            model.fit(daily_sales)
-            future = model.make_future_dataframe(periods=7)
-            forecast = model.predict(future)
-            st.pyplot(model.plot(forecast))
-            st.pyplot(model.plot_components(forecast))
-
-        # --- Category-wise Forecast ---
-        st.subheader("📊 Category-wise Sales Forecast")
-        categories = df["product_category"].unique().tolist()
-        selected_category = st.selectbox("Select a category:", categories, key="forecast_cat")
-
-        cat_sales = df[df["product_category"] == selected_category]
-        daily_cat_sales = cat_sales.groupby("date")["total_amount"].sum().reset_index()
-        daily_cat_sales.columns = ["ds", "y"]
-
-        if len(daily_cat_sales) > 10:
-            model_cat = Prophet(daily_seasonality=True)
-            model_cat.fit(daily_cat_sales)
-            forecast_cat = model_cat.predict(model_cat.make_future_dataframe(periods=7))
-            st.pyplot(model_cat.plot(forecast_cat))
-            st.success(f"✅ Forecast for **{selected_category}** (next 7 days).")
-        else:
-            st.warning("⚠️ Not enough data to forecast.")
+        # Daily date × branch × category totals, summaries included for old days
+        with step("load daily sales"):
+            df = load_daily_sales(load_transactions(data_file_version()))
 
-        # --- Branch-wise Forecast ---
-        st.subheader("🏬 Branch-wise Sales Forecast")
+        categories = df["product_category"].unique().tolist()
         branches = df["branch_id"].unique().tolist()
-        selected_branch = st.selectbox("Select a branch:", branches, key="forecast_branch")
-
-        branch_sales = df[df["branch_id"] == selected_branch]
-        daily_branch_sales = branch_sales.groupby("date")["total_amount"].sum().reset_index()
-        daily_branch_sales.columns = ["ds", "y"]
-
-        if len(daily_branch_sales) > 10:
-            model_branch = Prophet(daily_seasonality=True)
-            model_branch.fit(daily_branch_sales)
-            forecast_branch = model_branch.predict(model_branch.make_future_dataframe(periods=7))
-            st.pyplot(model_branch.plot(forecast_branch))
-            st.success(f"✅ Forecast for **{selected_branch}** (next 7 days).")
+        version = charts.data_version(DATA_FILE, SUMMARY_FILE)
+
+        if engine.startswith("⚡"):
+            # Vectorized Holt-Winters over every branch × category series in one pass
+            wide = all_daily_series(df)
+            forecast = forecast_all(wide, horizon=7)
+
+            def history_and_forecast(column):
+                return pd.concat(
+                    [wide[column].iloc[-60:].rename("Actual"), forecast[column].rename("Forecast")], axis=1
+                )
+
+            st.subheader("📈 Overall Sales Forecast (Next 7 Days)")
+            st.line_chart(history_and_forecast("Total"))
+
+            st.subheader("📊 Category-wise Sales Forecast")
+            selected_category = st.selectbox("Select a category:", categories, key="forecast_cat")
+            st.line_chart(history_and_forecast(f"Category: {selected_category}"))
+
+            st.subheader("🏬 Branch-wise Sales Forecast")
+            selected_branch = st.selectbox("Select a branch:", branches, key="forecast_branch")
+            st.line_chart(history_and_forecast(f"Branch: {selected_branch}"))
+
+            st.subheader("📋 Next 7 Days — All Series")
+            forecast_table = forecast.T.round(2)
+            forecast_table.columns = [d.strftime("%a %d %b") for d in forecast.index]
+            st.dataframe(forecast_table)
         else:
-            st.warning("⚠️ Not enough data to forecast.")
+            # --- Overall Forecast ---
+            st.subheader("📈 Overall Sales Forecast (Next 7 Days)")
+            daily_sales = df.groupby("date")["total_amount"].sum().reset_index()
+            daily_sales.columns = ["ds", "y"]
+
+            if len(daily_sales) > 10:
+                for image in charts.prophet_charts("total", daily_sales, version, components=True):
+                    charts.show(image)
+
+            # --- Category-wise Forecast ---
+            st.subheader("📊 Category-wise Sales Forecast")
+            selected_category = st.selectbox("Select a category:", categories, key="forecast_cat")
+
+            cat_sales = df[df["product_category"] == selected_category]
+            daily_cat_sales = cat_sales.groupby("date")["total_amount"].sum().reset_index()
+            daily_cat_sales.columns = ["ds", "y"]
+
+            if len(daily_cat_sales) > 10:
+                charts.show(charts.prophet_charts(f"category_{selected_category}", daily_cat_sales, version)[0])
+                st.success(f"✅ Forecast for **{selected_category}** (next 7 days).")
+            else:
+                st.warning("⚠️ Not enough data to forecast.")
+
+            # --- Branch-wise Forecast ---
+            st.subheader("🏬 Branch-wise Sales Forecast")
+            selected_branch = st.selectbox("Select a branch:", branches, key="forecast_branch")
+
+            branch_sales = df[df["branch_id"] == selected_branch]
+            daily_branch_sales = branch_sales.groupby("date")["total_amount"].sum().reset_index()
+            daily_branch_sales.columns = ["ds", "y"]
+
+            if len(daily_branch_sales) > 10:
+                charts.show(charts.prophet_charts(f"branch_{selected_branch}", daily_branch_sales, version)[0])
+                st.success(f"✅ Forecast for **{selected_branch}** (next 7 days).")
+            else:
+                st.warning("⚠️ Not enough data to forecast.")
 
     except Exception as e:
         st.error(f"Forecasting error: {e}")
 
-
-
+# =========================
+# ⏱️ Startup profile
+# =========================
+startup_total = startup_profiler.finish()
+if os.getenv("GROCER_PROFILE"):
+    with st.sidebar.expander(f"⏱️ Startup profile ({startup_total:.2f}s)"):
+        st.code(startup_profiler.report())
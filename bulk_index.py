@@ -0,0 +1,213 @@
+# =========================
+# bulk_index.py (Parallel, resumable vector index build)
+# =========================
+#
+# Streams the CSV in row batches, embeds them in a process pool (one
+# embedding model per core) and upserts each batch into Chroma. After every
+# written batch a checkpoint is saved next to the store, so an interrupted
+# build picks up where it stopped. Used by `python rag_pipeline.py --bulk`.
+
+import hashlib
+import os
+import json
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+EMBED_MODEL = "all-MiniLM-L6-v2"
+COLLECTION_NAME = "langchain"  # LangChain's default, so Chroma(persist_directory=...) can load it
+CHECKPOINT_FILE = "bulk_checkpoint.json"
+
+_embedder = None
+
+
+def _init_worker(model_name):
+    """Load one embedding model per worker process."""
+    global _embedder
+    try:
+        import torch
+        torch.set_num_threads(1)  # one core per worker, avoid oversubscription
+    except Exception:
+        pass
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    _embedder = HuggingFaceEmbeddings(model_name=model_name)
+
+
+def _embed_batch(batch):
+    """Worker task: split a batch of (id, text, metadata) rows and embed it."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    ids, texts, metadatas = [], [], []
+    for doc_id, text, metadata in batch:
+        for n, chunk in enumerate(splitter.split_text(text)):
+            ids.append(doc_id if n == 0 else f"{doc_id}#{n}")
+            texts.append(chunk)
+            metadatas.append(metadata)
+    vectors = _embedder.embed_documents(texts) if texts else []
+    return ids, texts, metadatas, vectors
+
+
+def row_to_text(row):
+    """Same page_content layout as CSVLoader ("column: value" per line)."""
+    return "\n".join(f"{k.strip()}: {str(v).strip()}" for k, v in row.items())
+
+
+def _fingerprint(path, size=None, window=65536):
+    """Size plus hashes of the first and last `window` bytes of the file's first `size` bytes.
+
+    Comparing it at the old size tells an append (old bytes untouched, e.g.
+    by ingest.py) apart from a rewrite (compaction, generate_data.py).
+    """
+    size = os.path.getsize(path) if size is None else size
+    with open(path, "rb") as f:
+        head = f.read(min(size, window))
+        f.seek(max(0, size - window))
+        tail = f.read(size - max(0, size - window))
+    return {"size": size, "head": hashlib.sha1(head).hexdigest(), "tail": hashlib.sha1(tail).hexdigest()}
+
+
+def _load_checkpoint(path, source):
+    """Return (checkpoint or None, stale). stale means the source was rewritten since it was written.
+
+    Rows appended after the checkpoint don't make it stale; the build resumes
+    and indexes them too.
+    """
+    if not os.path.exists(path):
+        return None, False
+    with open(path) as f:
+        ckpt = json.load(f)
+    old = ckpt.get("fingerprint") or {}
+    if (ckpt.get("source") != source or "head" not in old
+            or os.path.getsize(source) < old["size"] or _fingerprint(source, old["size"]) != old):
+        return None, True
+    return ckpt, False
+
+
+def row_doc_id(source, record, row_idx):
+    """Stable ID for a CSV row: its transaction_id (as ingest.py uses), else the row index."""
+    key = record.get("transaction_id") or row_idx
+    return f"{source}:{key}"
+
+
+def unique_doc_ids(ids, seen):
+    """Suffix repeated IDs (id, id~2, id~3, ...) so every row keeps its own document.
+
+    transaction_id isn't unique in practice: generate_data.py repeats
+    TRN-YYYYMMDD-i when it runs twice in a day, and ingest clients send their
+    own. seen counts the occurrences so far and is updated in place.
+    """
+    out = []
+    for doc_id in ids:
+        seen[doc_id] += 1
+        out.append(doc_id if seen[doc_id] == 1 else f"{doc_id}~{seen[doc_id]}")
+    return out
+
+
+def _save_checkpoint(path, ckpt):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(ckpt, f)
+    os.replace(tmp, path)  # atomic, a crash never leaves a half-written checkpoint
+
+
+def _iter_csv_batches(csv_path, batch_size, skip_rows):
+    """Yield batches of (id, text, metadata) CSVLoader-style rows, skipping skip_rows.
+
+    Skipped rows still count towards repeated IDs, so a resumed build suffixes
+    them exactly like an uninterrupted one.
+    """
+    row_idx = 0
+    seen = Counter()
+    reader = pd.read_csv(csv_path, dtype=str, keep_default_na=False, chunksize=batch_size)
+    for frame in reader:
+        records = frame.to_dict("records")
+        ids = unique_doc_ids([row_doc_id(csv_path, r, row_idx + n) for n, r in enumerate(records)], seen)
+        rows = []
+        for doc_id, record in zip(ids, records):
+            if row_idx >= skip_rows:
+                rows.append((doc_id, row_to_text(record), {"source": csv_path, "row": row_idx}))
+            row_idx += 1
+        if rows:
+            yield rows
+
+
+def _policy_batch(policy_path):
+    with open(policy_path, encoding="utf-8") as f:
+        text = f.read()
+    return [(f"{policy_path}:0", text, {"source": policy_path})]
+
+
+def bulk_build(csv_path, policy_path=None, persist_dir="./grocer_ai_db",
+               batch_size=512, workers=None, reset=False):
+    """Build (or resume building) a Chroma store from csv_path and policy_path."""
+    import chromadb
+
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(persist_dir, exist_ok=True)
+    ckpt_path = os.path.join(persist_dir, CHECKPOINT_FILE)
+    client = chromadb.PersistentClient(path=persist_dir)
+
+    fingerprint = _fingerprint(csv_path)
+    ckpt, stale = _load_checkpoint(ckpt_path, csv_path)
+    if stale and not reset:
+        # Rows may have been compacted away or shifted; documents from the old
+        # file would linger under IDs the new build never overwrites.
+        print("⚠️ Source file changed since the last checkpoint — dropping the store and rebuilding.")
+        reset = True
+
+    if reset:
+        ckpt = None
+        if os.path.exists(ckpt_path):
+            os.remove(ckpt_path)
+        try:
+            client.delete_collection(COLLECTION_NAME)
+        except Exception:
+            pass
+
+    ckpt = ckpt or {"source": csv_path, "rows_done": 0, "policies_done": False}
+    ckpt["fingerprint"] = fingerprint  # the next run checks these bytes are unchanged
+    collection = client.get_or_create_collection(COLLECTION_NAME)
+
+    if ckpt["rows_done"]:
+        print(f"♻️ Resuming from checkpoint: {ckpt['rows_done']:,} rows already indexed")
+    print(f"⚡ Bulk indexing {csv_path} with {workers} workers, {batch_size} rows per batch...")
+
+    started = time.perf_counter()
+    rows_this_run = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(EMBED_MODEL,)) as pool:
+        # Keep a bounded window of batches in flight and write them back in
+        # order, so rows_done in the checkpoint only ever moves forward.
+        pending = deque()
+
+        def write(future, n_rows):
+            nonlocal rows_this_run
+            ids, texts, metadatas, vectors = future.result()
+            if ids:
+                collection.upsert(ids=ids, documents=texts, metadatas=metadatas, embeddings=vectors)
+            ckpt["rows_done"] += n_rows
+            _save_checkpoint(ckpt_path, ckpt)
+            rows_this_run += n_rows
+            elapsed = time.perf_counter() - started
+            print(f"📈 {ckpt['rows_done']:,} rows indexed — {rows_this_run / elapsed:,.0f} rows/sec")
+
+        for rows in _iter_csv_batches(csv_path, batch_size, ckpt["rows_done"]):
+            pending.append((pool.submit(_embed_batch, rows), len(rows)))
+            if len(pending) >= workers * 2:
+                write(*pending.popleft())
+        while pending:
+            write(*pending.popleft())
+
+        if policy_path and not ckpt["policies_done"]:
+            ids, texts, metadatas, vectors = pool.submit(_embed_batch, _policy_batch(policy_path)).result()
+            collection.upsert(ids=ids, documents=texts, metadatas=metadatas, embeddings=vectors)
+            ckpt["policies_done"] = True
+            _save_checkpoint(ckpt_path, ckpt)
+            print(f"✅ Indexed {len(ids)} policy chunks")
+
+    elapsed = time.perf_counter() - started
+    print(f"🎉 Bulk build complete: {ckpt['rows_done']:,} rows in {elapsed:.1f}s "
+          f"({rows_this_run / max(elapsed, 1e-9):,.0f} rows/sec this run)")
+    return collection
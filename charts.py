@@ -0,0 +1,86 @@
+# =========================
+# charts.py (Cached chart rendering)
+# =========================
+#
+# Charts are rendered once to PNG/SVG bytes and cached by Streamlit, keyed on
+# the (small, pre-aggregated) data they plot — which already encodes the
+# filter state — plus the data file version. Figures are closed right after
+# rendering, so long-running sessions don't accumulate matplotlib figures.
+
+import io
+import os
+
+import streamlit as st
+
+MAX_CACHED_CHARTS = 64
+
+
+def _pyplot():
+    """Import matplotlib on first use, so pages without charts never pay for it."""
+    import matplotlib
+    matplotlib.use("Agg")  # headless rendering, no GUI backend needed on the server
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def data_version(*paths):
+    """Cheap version tag for cache keys: modification times of the data files."""
+    return tuple(os.path.getmtime(p) if os.path.exists(p) else 0 for p in paths)
+
+
+def _to_bytes(fig, fmt="png"):
+    """Render a figure to bytes and close it."""
+    buf = io.BytesIO()
+    try:
+        fig.savefig(buf, format=fmt, bbox_inches="tight")
+    finally:
+        _pyplot().close(fig)
+    return buf.getvalue()
+
+
+def _series_chart(series, kind, title, ylabel, fmt, **style):
+    """Plot a series and render it; the figure is closed even if plotting fails."""
+    plt = _pyplot()
+    fig, ax = plt.subplots()
+    try:
+        series.plot(kind=kind, ax=ax, **style)
+        ax.set_ylabel(ylabel)
+        ax.set_title(title)
+    except Exception:
+        plt.close(fig)
+        raise
+    return _to_bytes(fig, fmt)
+
+
+@st.cache_data(max_entries=MAX_CACHED_CHARTS, show_spinner=False)
+def line_chart(series, title, ylabel, fmt="png"):
+    return _series_chart(series, "line", title, ylabel, fmt, marker="o")
+
+
+@st.cache_data(max_entries=MAX_CACHED_CHARTS, show_spinner=False)
+def bar_chart(series, title, ylabel, fmt="png"):
+    return _series_chart(series, "bar", title, ylabel, fmt, color="skyblue")
+
+
+@st.cache_data(max_entries=MAX_CACHED_CHARTS, show_spinner=False)
+def prophet_charts(key, daily, version, components=False, fmt="png"):
+    """Prophet forecast plot (and optionally the components plot) as bytes.
+
+    The fitted model never leaves this function; only the rendered images
+    are cached.
+    """
+    from forecasting import fit_prophet
+
+    model, forecast = fit_prophet(key, daily)
+    images = [_to_bytes(model.plot(forecast), fmt)]
+    if components:
+        images.append(_to_bytes(model.plot_components(forecast), fmt))
+    return images
+
+
+def show(image):
+    """Display cached chart bytes (PNG or SVG)."""
+    if image.lstrip().startswith(b"<"):
+        st.image(image.decode("utf-8"))
+    else:
+        st.image(image)
@@ -0,0 +1,232 @@
+# =========================
+# compaction.py (Retention + compaction for the rolling dataset)
+# =========================
+#
+# Keeps the hot working set small:
+#   - raw transactions are kept only for the last RAW_RETENTION_DAYS days
+#   - older days are rolled into grocer_ai_daily_summary.csv
+#     (one row per date × branch × category: transactions, quantity, total_amount)
+#   - summaries older than HISTORY_DAYS are dropped, like the old 365-day trim
+#
+# load_daily_sales() stitches summaries and recent raw rows back together, so
+# dashboards, forecasts and run_query see the full history at daily grain.
+#
+# The summary's first line records its watermark ("# compacted_before: DATE"):
+# every day before it lives in the summary, every day from it on in the raw
+# file. It is replaced atomically together with the summary rows, so raw rows
+# dated before it are leftovers of a run that crashed before rewriting the raw
+# file and are never counted twice. ingest.py rejects events older than
+# oldest_raw_date() for the same reason.
+#
+# Everything that writes DATA_FILE holds DataFileLock: ingest.py while it
+# appends, generate_data.py and `python compaction.py` from reading the file
+# until the rewritten copy is saved. Without it, events appended in between
+# would be overwritten by the rewrite.
+#
+#   python compaction.py               # compact grocer_ai_data.csv in place
+#   python compaction.py --sample 10000  # also write a stratified index sample
+
+import argparse
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DATA_FILE = "grocer_ai_data.csv"
+SUMMARY_FILE = "grocer_ai_daily_summary.csv"
+SAMPLE_FILE = "grocer_ai_data_sample.csv"
+RAW_RETENTION_DAYS = 90
+HISTORY_DAYS = 365
+
+SUMMARY_KEYS = ["date", "branch_id", "product_category"]
+SUMMARY_COLUMNS = SUMMARY_KEYS + ["transactions", "quantity", "total_amount"]
+WATERMARK_PREFIX = "# compacted_before: "
+
+
+class DataFileLock:
+    """Exclusive lock on data_file + ".lock" (flock; released if the process dies)."""
+
+    def __init__(self, data_file=DATA_FILE):
+        self.path = data_file + ".lock"
+        self._fd = None
+
+    def acquire(self):
+        if fcntl is None:
+            print("⚠️ File locking unavailable on this platform; don't run ingest.py during the daily update.",
+                  file=sys.stderr)
+            return
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def summarize(df):
+    """Aggregate raw transactions to one row per date × branch × category."""
+    if df.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    data = df.assign(date=pd.to_datetime(df["date_time"]).dt.date)
+    return (
+        data.groupby(SUMMARY_KEYS)
+        .agg(transactions=("total_amount", "size"), quantity=("quantity", "sum"), total_amount=("total_amount", "sum"))
+        .reset_index()
+    )
+
+
+def read_watermark(summary_file=SUMMARY_FILE):
+    """First day not covered by the summary file, or None if it has no watermark line."""
+    if not os.path.exists(summary_file):
+        return None
+    with open(summary_file) as f:
+        first = f.readline()
+    if not first.startswith(WATERMARK_PREFIX):
+        return None
+    return date.fromisoformat(first[len(WATERMARK_PREFIX):].strip())
+
+
+def load_summary(summary_file=SUMMARY_FILE):
+    """Return (summary, watermark); the summary holds exactly the days before watermark.
+
+    Files written before watermarks existed get max(date) + 1 day.
+    """
+    if not os.path.exists(summary_file):
+        return pd.DataFrame(columns=SUMMARY_COLUMNS), None
+    watermark = read_watermark(summary_file)
+    summary = pd.read_csv(summary_file, skiprows=0 if watermark is None else 1)
+    summary["date"] = pd.to_datetime(summary["date"]).dt.date
+    if watermark is None and not summary.empty:
+        watermark = summary["date"].max() + timedelta(days=1)
+    return summary, watermark
+
+
+def _write_summary(summary, watermark, summary_file):
+    tmp = summary_file + ".tmp"
+    with open(tmp, "w", newline="") as f:
+        f.write(f"{WATERMARK_PREFIX}{watermark.isoformat()}\n")
+        summary.sort_values(SUMMARY_KEYS).to_csv(f, index=False)
+    os.replace(tmp, summary_file)  # atomic: rows and watermark always change together
+
+
+def oldest_raw_date(summary_file=SUMMARY_FILE, raw_days=RAW_RETENTION_DAYS, now=None):
+    """Oldest date new raw rows may carry: older days are (or soon will be) compacted."""
+    oldest = (now or datetime.now()).date() - timedelta(days=raw_days)
+    watermark = read_watermark(summary_file)
+    return max(oldest, watermark) if watermark else oldest
+
+
+def compact(df, summary_file=SUMMARY_FILE, raw_days=RAW_RETENTION_DAYS, history_days=HISTORY_DAYS, now=None):
+    """Roll raw rows older than raw_days into the summary file.
+
+    Returns the raw rows to keep. Cutoffs are whole days, so a day is never
+    split between raw and summary. Only days between the stored watermark and
+    the new cutoff are added; raw rows before the watermark are already in the
+    summary (left by a run that crashed before the raw file was rewritten).
+    """
+    today = (now or datetime.now()).date()
+    history_cutoff = today - timedelta(days=history_days)
+    summary, watermark = load_summary(summary_file)
+    cutoff = today - timedelta(days=raw_days)
+    if watermark is not None:
+        cutoff = max(cutoff, watermark)
+
+    dates = pd.to_datetime(df["date_time"]).dt.date
+    done = (dates < watermark) if watermark is not None else pd.Series(False, index=df.index)
+    old = df[~done & (dates < cutoff)]
+    recent = df[dates >= cutoff]
+
+    summary = pd.concat([summary, summarize(old)], ignore_index=True)
+    summary = summary[summary["date"] >= history_cutoff]
+    if not summary.empty:
+        summary = summary.groupby(SUMMARY_KEYS, as_index=False)[["transactions", "quantity", "total_amount"]].sum()
+    _write_summary(summary, cutoff, summary_file)
+
+    if done.any():
+        print(f"♻️ Dropped {int(done.sum()):,} raw rows before {watermark} that were already compacted")
+    if len(old):
+        print(f"🗜️ Compacted {len(old):,} raw rows older than {cutoff} into {summary_file}")
+    return recent
+
+
+def load_daily_sales(raw_df=None, data_file=DATA_FILE, summary_file=SUMMARY_FILE):
+    """Full history at date × branch × category grain (summaries + recent raw rows).
+
+    Has the columns date, branch_id, product_category, transactions, quantity
+    and total_amount; "date" holds datetime.date values like the raw frames.
+    """
+    if raw_df is None:
+        raw_df = pd.read_csv(data_file, parse_dates=["date_time"]) if os.path.exists(data_file) else pd.DataFrame()
+    summary, watermark = load_summary(summary_file)
+    recent = summarize(raw_df) if not raw_df.empty else pd.DataFrame(columns=SUMMARY_COLUMNS)
+    if watermark is not None and not recent.empty:
+        recent = recent[recent["date"] >= watermark]  # already in the summary
+    daily = pd.concat([summary, recent], ignore_index=True)
+    if daily.empty:
+        return daily
+    return daily.groupby(SUMMARY_KEYS, as_index=False)[["transactions", "quantity", "total_amount"]].sum()
+
+
+def merge_daily_sales(daily, raw_rows):
+    """Add newly arrived raw rows to a load_daily_sales() frame.
+
+    The rows must not predate the summary watermark (ingest.py ensures this).
+    """
+    daily = pd.concat([daily, summarize(raw_rows)], ignore_index=True)
+    return daily.groupby(SUMMARY_KEYS, as_index=False)[["transactions", "quantity", "total_amount"]].sum()
+
+
+def stratified_sample(df, n, by=("branch_id", "product_category", "month"), seed=42):
+    """Sample about n rows, proportionally from every stratum (at least one row each).
+
+    Unlike df.sample(n), small branches, categories and months are always
+    represented in the vector index.
+    """
+    if len(df) <= n:
+        return df
+    data = df.assign(month=pd.to_datetime(df["date_time"]).dt.to_period("M"))
+    frac = n / len(data)
+    parts = []
+    for _, group in data.groupby(list(by)):
+        take = max(1, int(round(len(group) * frac)))
+        parts.append(group.sample(n=min(take, len(group)), random_state=seed))
+    return pd.concat(parts).drop(columns="month").sort_values("date_time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact old transactions into daily summaries")
+    parser.add_argument("--raw-days", type=int, default=RAW_RETENTION_DAYS, help="days of raw rows to keep")
+    parser.add_argument("--sample", type=int, default=0, help=f"also write a stratified sample of N rows to {SAMPLE_FILE}")
+    args = parser.parse_args()
+
+    with DataFileLock(DATA_FILE):
+        df = pd.read_csv(DATA_FILE, parse_dates=["date_time"])
+        print("Original rows:", len(df))
+        recent = compact(df, raw_days=args.raw_days)
+        if len(recent) < len(df):
+            recent.to_csv(DATA_FILE, index=False)
+    print(f"✅ Raw rows kept: {len(recent):,}")
+
+    if args.sample:
+        sample = stratified_sample(recent, args.sample)
+        sample.to_csv(SAMPLE_FILE, index=False)
+        print("Saved sample file with rows:", len(sample))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+# =========================
+# eval_retrieval.py (Retrieval quality + latency evaluation)
+# =========================
+#
+# Runs the labelled questions in eval_questions.json against the Chroma
+# stores and reports recall@k, MRR and per-query latency for every
+# configuration, so k / chunk size / embedding model / hybrid search can be
+# tuned with numbers instead of eyeballing "refund policy" results.
+#
+#   python eval_retrieval.py                         # existing stores, k and hybrid sweep
+#   python eval_retrieval.py --rebuild --chunk-sizes 500 1000 \
+#       --models all-MiniLM-L6-v2 all-mpnet-base-v2  # temporary stores per chunk size / model
+#
+# A document is relevant when it contains every "relevant" string of the
+# question. recall@k is the share of questions with a relevant document in
+# the top k; MRR uses the rank of the first relevant document.
+
+import argparse
+import json
+import math
+import os
+import re
+import statistics
+import time
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+
+DATA_FILE = "grocer_ai_data.csv"
+POLICY_FILE = "grocer_ai_policies.txt"
+QUESTIONS_FILE = "eval_questions.json"
+REPORT_FILE = "eval_report.csv"
+EMBED_MODEL = "all-MiniLM-L6-v2"
+STORE_DIRS = {"transactions": "./grocer_ai_db_csv", "policies": "./grocer_ai_db_policies"}
+
+_TOKEN_RE = re.compile(r"\w[\w\-]*")
+
+
+def _tokens(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+# =========================
+# ❓ Question set
+# =========================
+def load_questions(path=QUESTIONS_FILE, csv_path=DATA_FILE, samples=5, seed=42, max_rows=None):
+    """Load labelled questions, filling {column} templates from sampled CSV rows.
+
+    With max_rows, rows are sampled from the newest max_rows only — the rows
+    build_temp_stores() indexes — so every templated question has an answer.
+    """
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+
+    rows = []
+    if any("{" in e["question"] for e in entries) and os.path.exists(csv_path):
+        data = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+        if max_rows:
+            data = data.tail(max_rows)
+        data["date"] = data["date_time"].str[:10]
+        rows = data.sample(n=min(samples, len(data)), random_state=seed).to_dict("records")
+
+    questions = []
+    for entry in entries:
+        if "{" not in entry["question"]:
+            questions.append(entry)
+            continue
+        for row in rows:
+            questions.append({
+                **entry,
+                "question": entry["question"].format(**row),
+                "relevant": [r.format(**row) for r in entry["relevant"]],
+            })
+    return questions
+
+
+def is_relevant(text, relevant):
+    text = text.lower()
+    return all(r.lower() in text for r in relevant)
+
+
+# =========================
+# 🔎 Retrieval modes
+# =========================
+class BM25:
+    """Small Okapi BM25 over a store's documents, used for the hybrid mode."""
+
+    def __init__(self, docs, k1=1.5, b=0.75):
+        self.docs = docs
+        self.k1, self.b = k1, b
+        self.tfs = [Counter(_tokens(d)) for d in docs]
+        self.lens = [sum(tf.values()) for tf in self.tfs]
+        self.avg_len = (sum(self.lens) / len(self.lens)) if self.lens else 0
+        df = Counter(t for tf in self.tfs for t in tf)
+        n = len(docs)
+        self.idf = {t: math.log(1 + (n - c + 0.5) / (c + 0.5)) for t, c in df.items()}
+
+    def top(self, query, k):
+        terms = [t for t in _tokens(query) if t in self.idf]
+        scores = []
+        for i, tf in enumerate(self.tfs):
+            s = 0.0
+            for t in terms:
+                f = tf.get(t)
+                if f:
+                    norm = 1 - self.b + self.b * self.lens[i] / (self.avg_len or 1)
+                    s += self.idf[t] * f * (self.k1 + 1) / (f + self.k1 * norm)
+            if s:
+                scores.append((s, i))
+        scores.sort(reverse=True)
+        return [self.docs[i] for _, i in scores[:k]]
+
+
+def search(store, bm25, query, k, mode):
+    """Return the top-k page_content strings for query."""
+    if mode == "vector":
+        return [d.page_content for d in store.similarity_search(query, k=k)]
+    # hybrid: reciprocal rank fusion of vector and BM25 rankings
+    vector = [d.page_content for d in store.similarity_search(query, k=k * 4)]
+    keyword = bm25.top(query, k * 4)
+    fused = Counter()
+    for ranking in (vector, keyword):
+        for rank, text in enumerate(ranking):
+            fused[text] += 1 / (60 + rank)
+    return [text for text, _ in fused.most_common(k)]
+
+
+# =========================
+# 📦 Stores
+# =========================
+def _store_texts(store):
+    return store.get(include=["documents"])["documents"]
+
+
+def open_existing_stores(model=EMBED_MODEL):
+    from langchain_community.vectorstores import Chroma
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    embeddings = HuggingFaceEmbeddings(model_name=model)
+    stores = {}
+    for name, path in STORE_DIRS.items():
+        if os.path.exists(path):
+            stores[name] = Chroma(persist_directory=path, embedding_function=embeddings)
+        else:
+            print(f"⚠️ Skipping {name}: {path} not found")
+    return stores
+
+
+def build_temp_stores(model, chunk_size, csv_path=DATA_FILE, max_rows=5000):
+    """In-memory stores for one (embedding model, chunk size) configuration."""
+    from langchain_community.document_loaders import CSVLoader, TextLoader
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from langchain_community.vectorstores import Chroma
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    embeddings = HuggingFaceEmbeddings(model_name=model)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_size // 5)
+    csv_docs = CSVLoader(file_path=csv_path).load()[-max_rows:]
+    policy_docs = TextLoader(POLICY_FILE).load()
+    tag = f"{re.sub(r'[^A-Za-z0-9]', '', model)}_{chunk_size}"
+    return {
+        "transactions": Chroma.from_documents(splitter.split_documents(csv_docs), embeddings,
+                                              collection_name=f"eval_csv_{tag}"),
+        "policies": Chroma.from_documents(splitter.split_documents(policy_docs), embeddings,
+                                          collection_name=f"eval_policies_{tag}"),
+    }
+
+
+# =========================
+# 📊 Evaluation
+# =========================
+def evaluate(stores, questions, ks, modes, config):
+    """Return one report row per (store, mode, k, category), plus an 'all' row."""
+    rows = []
+    for store_name, store in stores.items():
+        qs = [q for q in questions if q["store"] == store_name]
+        if not qs:
+            continue
+        bm25 = BM25(_store_texts(store)) if "hybrid" in modes else None
+        for mode in modes:
+            for k in ks:
+                results = []
+                for q in qs:
+                    started = time.perf_counter()
+                    docs = search(store, bm25, q["question"], k, mode)
+                    latency_ms = (time.perf_counter() - started) * 1000
+                    rank = next((i + 1 for i, d in enumerate(docs) if is_relevant(d, q["relevant"])), None)
+                    results.append((q["category"], rank, latency_ms))
+
+                for category in ["all"] + sorted({c for c, _, _ in results}):
+                    subset = [r for r in results if category == "all" or r[0] == category]
+                    latencies = sorted(r[2] for r in subset)
+                    rows.append({
+                        **config,
+                        "store": store_name, "mode": mode, "k": k, "category": category,
+                        "questions": len(subset),
+                        "recall_at_k": round(sum(1 for r in subset if r[1]) / len(subset), 3),
+                        "mrr": round(sum(1 / r[1] for r in subset if r[1]) / len(subset), 3),
+                        "latency_mean_ms": round(statistics.mean(latencies), 1),
+                        "latency_p50_ms": round(latencies[len(latencies) // 2], 1),
+                        "latency_p95_ms": round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 1),
+                    })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and latency")
+    parser.add_argument("--questions", default=QUESTIONS_FILE)
+    parser.add_argument("--csv", default=DATA_FILE, help="CSV used to fill question templates (and --rebuild)")
+    parser.add_argument("--samples", type=int, default=5, help="rows sampled per templated question")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--modes", nargs="+", default=["vector", "hybrid"], choices=["vector", "hybrid"])
+    parser.add_argument("--rebuild", action="store_true", help="build temporary stores per chunk size / model")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[1000])
+    parser.add_argument("--models", nargs="+", default=[EMBED_MODEL])
+    parser.add_argument("--max-rows", type=int, default=5000, help="newest CSV rows indexed with --rebuild")
+    parser.add_argument("--report", default=REPORT_FILE, help="CSV report (appended, one run_id per run)")
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions, args.csv, args.samples,
+                               max_rows=args.max_rows if args.rebuild else None)
+    print(f"❓ Loaded {len(questions)} labelled questions")
+    run_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+
+    rows = []
+    if args.rebuild:
+        for model in args.models:
+            for chunk_size in args.chunk_sizes:
+                print(f"⚡ Building temporary stores: {model}, chunk_size={chunk_size}")
+                stores = build_temp_stores(model, chunk_size, args.csv, args.max_rows)
+                rows += evaluate(stores, questions, args.k, args.modes,
+                                 {"run_id": run_id, "embedding": model, "chunk_size": chunk_size})
+    else:
+        stores = open_existing_stores(args.models[0])
+        rows += evaluate(stores, questions, args.k, args.modes,
+                         {"run_id": run_id, "embedding": args.models[0], "chunk_size": "existing"})
+
+    if not rows:
+        print("❌ Nothing evaluated — build the stores first (run query_app.py or rag_pipeline.py).")
+        return
+
+    report = pd.DataFrame(rows)
+    report.to_csv(args.report, mode="a", index=False, header=not os.path.exists(args.report))
+    print(report[report["category"] == "all"].to_string(index=False))
+    print(f"\n📄 Full report (per category) appended to {args.report} as run {run_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# =========================
+# forecasting.py (Sales forecasting engines)
+# =========================
+#
+# Two engines:
+#   ⚡ fast    → vectorized Holt-Winters / seasonal-naive in NumPy, every
+#               series (total, categories, branches, branch × category) at once
+#   🎯 prophet → Prophet per series, warm-started from yesterday's fitted
+#               parameters (saved under MODEL_DIR) instead of fitting from scratch
+
+import os
+import re
+import itertools
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+MODEL_DIR = "forecast_models"
+SEASON = 7  # weekly seasonality on daily data
+
+
+# =========================
+# 📅 Daily series
+# =========================
+def all_daily_series(df):
+    """Wide frame of daily sales: one row per day, one column per series.
+
+    Columns: "Total", "Category: X", "Branch: Y" and "Y / X" for every
+    branch × category pair. Days without sales are filled with 0.
+    """
+    data = df[["date", "branch_id", "product_category", "total_amount"]].copy()
+    data["date"] = pd.to_datetime(data["date"])
+    days = pd.date_range(data["date"].min(), data["date"].max(), freq="D")
+
+    def pivot(columns, label):
+        wide = data.pivot_table(index="date", columns=columns, values="total_amount", aggfunc="sum")
+        wide.columns = [label(c) for c in wide.columns]
+        return wide
+
+    total = data.groupby("date")["total_amount"].sum().to_frame("Total")
+    wide = pd.concat([
+        total,
+        pivot("product_category", lambda c: f"Category: {c}"),
+        pivot("branch_id", lambda b: f"Branch: {b}"),
+        pivot(["branch_id", "product_category"], lambda bc: f"{bc[0]} / {bc[1]}"),
+    ], axis=1)
+    return wide.reindex(days).fillna(0.0)
+
+
+# =========================
+# ⚡ Vectorized engines
+# =========================
+def seasonal_naive(Y, horizon=7, season=SEASON):
+    """Repeat the last full season. Y is (days, series)."""
+    last = Y[-season:]
+    reps = int(np.ceil(horizon / season))
+    return np.tile(last, (reps, 1))[:horizon]
+
+
+def _holt_winters_run(Y, alpha, beta, gamma, horizon, season):
+    """Additive Holt-Winters for all columns of Y; returns (sse, forecast)."""
+    n = Y.shape[0]
+    level = Y[:season].mean(axis=0)
+    trend = (Y[season:2 * season].mean(axis=0) - level) / season
+    seasonal = Y[:season] - level
+    sse = np.zeros(Y.shape[1])
+
+    for t in range(season, n):
+        s = seasonal[t % season]
+        err = Y[t] - (level + trend + s)
+        sse += err * err
+        prev_level = level
+        level = alpha * (Y[t] - s) + (1 - alpha) * (level + trend)
+        trend = beta * (level - prev_level) + (1 - beta) * trend
+        seasonal[t % season] = gamma * (Y[t] - level) + (1 - gamma) * s
+
+    steps = np.arange(1, horizon + 1)[:, None]
+    season_idx = (n + steps.ravel() - 1) % season
+    return sse, level + steps * trend + seasonal[season_idx]
+
+
+def holt_winters(Y, horizon=7, season=SEASON,
+                 alphas=(0.1, 0.3, 0.5), betas=(0.0, 0.05), gammas=(0.1, 0.3)):
+    """Holt-Winters for every series at once, smoothing parameters picked per
+    series from a small grid by in-sample one-step error."""
+    Y = np.asarray(Y, dtype=float)
+    if Y.shape[0] < season:
+        return np.repeat(Y.mean(axis=0, keepdims=True), horizon, axis=0)
+    if Y.shape[0] < 2 * season:
+        return seasonal_naive(Y, horizon, season)
+
+    best_sse = np.full(Y.shape[1], np.inf)
+    best = np.zeros((horizon, Y.shape[1]))
+    for alpha, beta, gamma in itertools.product(alphas, betas, gammas):
+        sse, fc = _holt_winters_run(Y, alpha, beta, gamma, horizon, season)
+        better = sse < best_sse
+        best_sse[better] = sse[better]
+        best[:, better] = fc[:, better]
+    return best
+
+
+def forecast_all(wide, horizon=7, method="holt_winters"):
+    """Forecast every column of a wide daily frame; returns a frame indexed by future dates."""
+    engine = holt_winters if method == "holt_winters" else seasonal_naive
+    fc = np.clip(engine(wide.to_numpy(), horizon), 0, None)  # sales can't go negative
+    future = pd.date_range(wide.index.max() + pd.Timedelta(days=1), periods=horizon, freq="D")
+    return pd.DataFrame(fc, index=future, columns=wide.columns)
+
+
+# =========================
+# 🎯 Prophet (warm-started)
+# =========================
+def _stan_init(model):
+    """Fitted parameters of a Prophet model, in the form fit(init=...) expects."""
+    res = {}
+    for pname in ["k", "m", "sigma_obs"]:
+        res[pname] = model.params[pname][0][0]
+    for pname in ["delta", "beta"]:
+        res[pname] = model.params[pname][0]
+    return res
+
+
+def _same_history(history, daily):
+    """True if two ds/y frames hold the same values, whatever their datetime resolution."""
+    if len(history) != len(daily):
+        return False
+    ds_old = history["ds"].to_numpy().astype("datetime64[ns]")
+    ds_new = daily["ds"].to_numpy().astype("datetime64[ns]")
+    return bool(np.array_equal(ds_old, ds_new) and
+                np.allclose(history["y"].to_numpy(dtype=float), daily["y"].to_numpy(dtype=float)))
+
+
+def _model_path(key):
+    return os.path.join(MODEL_DIR, re.sub(r"[^A-Za-z0-9_-]+", "_", key) + ".json")
+
+
+def fit_prophet(key, daily, horizon=7):
+    """Fit Prophet on a ds/y frame and forecast `horizon` days.
+
+    The previous fit for `key` is kept on disk. If the history hasn't changed
+    it is reused as is; otherwise the new fit starts from its parameters,
+    which converges much faster when only a day or two was added.
+    Returns (model, forecast).
+    """
+    from prophet import Prophet
+    from prophet.serialize import model_to_json, model_from_json
+
+    daily = daily.copy()
+    daily["ds"] = pd.to_datetime(daily["ds"])
+    path = _model_path(key)
+
+    previous = None
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                previous = model_from_json(f.read())
+        except Exception as e:
+            print(f"⚠️ Could not load saved Prophet model for {key}: {e}")
+
+    if previous is not None and _same_history(previous.history, daily):
+        model = previous
+    else:
+        model = Prophet(daily_seasonality=True)
+        try:
+            if previous is not None:
+                model.fit(daily, init=_stan_init(previous))
+            else:
+                model.fit(daily)
+        except Exception as e:
+            print(f"⚠️ Warm start failed for {key} ({e}) — fitting from scratch")
+            model = Prophet(daily_seasonality=True)
+            model.fit(daily)
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        # Sessions fit concurrently: write a private temp file, then swap it in
+        # atomically so readers never load a half-written model.
+        fd, tmp = tempfile.mkstemp(dir=MODEL_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(model_to_json(model))
+            os.replace(tmp, path)
+        except Exception:
+            os.remove(tmp)
+            raise
+
+    forecast = model.predict(model.make_future_dataframe(periods=horizon))
+    return model, forecast
@@ -1,9 +1,11 @@
 import pandas as pd
 from faker import Faker
 import random
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
 
+from compaction import DataFileLock, compact
+
 # Initialize Faker
 Faker.seed(0)
 fake = Faker()
@@ -14,6 +16,11 @@ NUM_PRODUCTS = 100
 DATA_FILE = "grocer_ai_data.csv"
 POLICY_FILE = "grocer_ai_policies.txt"
 
+# Hold the data file lock from reading to saving, so events that ingest.py
+# appends meanwhile wait for the rewrite instead of being overwritten by it
+data_lock = DataFileLock(DATA_FILE)
+data_lock.acquire()
+
 # Employees list
 employees = []
 if os.path.exists(DATA_FILE):
@@ -90,13 +97,13 @@ if not existing_df.empty:
 else:
     final_df = new_df
 
-# Keep only last 365 days
+# Keep raw rows for the recent window only; older days roll into daily summaries
 final_df['date_time'] = pd.to_datetime(final_df['date_time'])
-cutoff = datetime.now() - timedelta(days=365)
-final_df = final_df[final_df['date_time'] >= cutoff]
+final_df = compact(final_df)
 
 # Save
 final_df.to_csv(DATA_FILE, index=False)
+data_lock.release()
 print(f"✅ Added {DAILY_NEW_TRANSACTIONS} rows for {today.date()} — total rows: {len(final_df)}")
 
 # --- Occasionally update policies ---
@@ -0,0 +1,397 @@
+# =========================
+# ingest.py (Real-time transaction ingest)
+# =========================
+#
+# Accepts transaction events as JSON lines and flushes them in micro-batches:
+#   - appended to grocer_ai_data.csv (no whole-file rewrite)
+#   - upserted into the transactions vector store (./grocer_ai_db_csv)
+# Events dated before compaction.oldest_raw_date() are rejected: those days
+# are already rolled into the daily summary, so a raw row there would be
+# ignored by load_daily_sales() and dropped by the next compaction.
+# A batch is flushed when it reaches --batch-size events or is --max-wait
+# seconds old. Readers block when --max-pending events are waiting, which
+# pushes back on the producer (socket clients stop being read, pipes fill up).
+# Appends take compaction.DataFileLock, so they wait while the daily job
+# rewrites the CSV instead of being lost; events keep queueing meanwhile.
+#
+#   tail -f events.jsonl | python ingest.py --file -
+#   python ingest.py --file events.jsonl          # follow a file
+#   python ingest.py --socket /tmp/grocer.sock    # local unix socket
+#   python ingest.py --tcp 8765                   # 127.0.0.1 only
+#
+# Readers of the CSV (run_query) pick up appended rows with CsvTail, which
+# parses only the bytes added since the last read.
+#
+# Limitation: the vector store is written from this process through its own
+# chromadb.PersistentClient. An app that is already running keeps the
+# collection it opened at startup and won't retrieve the new documents until
+# it is restarted; direct sales figures in run_query come from the CSV and do
+# update live.
+
+import argparse
+import io
+import json
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+
+from compaction import SUMMARY_FILE, DataFileLock, oldest_raw_date
+
+DATA_FILE = "grocer_ai_data.csv"
+CSV_STORE_DIR = "./grocer_ai_db_csv"
+COLUMNS = [
+    "transaction_id", "date_time", "customer_id", "branch_id", "employee_id", "product_sku",
+    "product_name", "product_category", "unit_price", "quantity", "total_amount",
+    "customer_feedback", "referral_source", "employee_name", "role", "date_of_joining",
+]
+REQUIRED = ["branch_id", "product_name", "product_category", "quantity"]
+DATE_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"  # what generate_data.py writes
+
+_STOP = object()
+
+
+# =========================
+# 🧾 Events
+# =========================
+def _parse_date_time(value, default):
+    """ISO date/time → naive local datetime; a single unparseable value would
+    otherwise turn the whole CSV column into strings for every reader."""
+    if value in (None, ""):
+        return default
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"invalid date_time {value!r} (expected ISO format, e.g. 2026-10-19 10:00:00)")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def normalize_event(event, seq, min_date=None):
+    """Validate one event and fill defaults; raises ValueError if unusable."""
+    missing = [c for c in REQUIRED if event.get(c) in (None, "")]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    row = {c: event.get(c, "") for c in COLUMNS}
+    now = datetime.now()
+    when = _parse_date_time(event.get("date_time"), now)
+    if min_date is not None and when.date() < min_date:
+        raise ValueError(f"date_time {when} is before {min_date}; older days are already compacted")
+    row["date_time"] = when.strftime(DATE_TIME_FORMAT)
+    row["quantity"] = int(event["quantity"])
+    if event.get("total_amount") in (None, ""):
+        if event.get("unit_price") in (None, ""):
+            raise ValueError("needs unit_price or total_amount")
+        row["total_amount"] = round(float(event["unit_price"]) * row["quantity"], 2)
+    row["total_amount"] = float(row["total_amount"])
+    if not row["transaction_id"]:
+        row["transaction_id"] = f"TRN-LIVE-{now.strftime('%Y%m%d%H%M%S')}-{seq}"
+    return row
+
+
+# =========================
+# 💾 Micro-batch writer
+# =========================
+class MicroBatchWriter:
+    """Buffers events from a bounded queue and flushes them in batches."""
+
+    def __init__(self, data_file=DATA_FILE, store_dir=CSV_STORE_DIR, batch_size=200,
+                 max_wait=2.0, max_pending=10000, index=True, summary_file=SUMMARY_FILE):
+        self.data_file = data_file
+        self.summary_file = summary_file
+        self.store_dir = store_dir
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.index = index
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._collection = None
+        self._embeddings = None
+        self._seen_ids = Counter()
+        self._warned_no_store = False
+        self._min_date, self._min_date_at = None, None
+
+    def submit_line(self, line):
+        """Parse one JSON line and enqueue it (blocks while the queue is full)."""
+        line = line.strip()
+        if not line:
+            return
+        try:
+            with self._lock:
+                self._seq += 1
+                seq = self._seq
+            row = normalize_event(json.loads(line), seq, self.min_date())
+        except Exception as e:
+            self.rejected += 1
+            print(f"⚠️ Rejected event: {e}")
+            return
+        self.queue.put(row)  # backpressure
+        with self._lock:
+            self.accepted += 1
+
+    def min_date(self, max_age=60.0):
+        """oldest_raw_date(), re-read at most every max_age seconds (it moves once a day)."""
+        with self._lock:
+            if self._min_date_at is None or time.monotonic() - self._min_date_at > max_age:
+                self._min_date = oldest_raw_date(self.summary_file)
+                self._min_date_at = time.monotonic()
+            return self._min_date
+
+    def stop(self):
+        self.queue.put(_STOP)
+
+    def run(self):
+        """Flush loop; returns after stop() once everything is written."""
+        batch, first_at = [], None
+        while True:
+            timeout = None if not batch else max(0.0, self.max_wait - (time.monotonic() - first_at))
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self.flush(batch)
+                return
+            if item is not None:
+                if not batch:
+                    first_at = time.monotonic()
+                batch.append(item)
+            if batch and (len(batch) >= self.batch_size or time.monotonic() - first_at >= self.max_wait):
+                self.flush(batch)
+                batch = []
+
+    def flush(self, batch):
+        if not batch:
+            return
+        started = time.perf_counter()
+        frame = pd.DataFrame(batch, columns=COLUMNS)
+        self._append_csv(frame)
+        if self.index:
+            self._index(frame)
+        self.written += len(frame)
+        print(f"📥 Flushed {len(frame)} events in {(time.perf_counter() - started) * 1000:.0f} ms "
+              f"(total {self.written:,}, pending {self.queue.qsize()})")
+
+    def _append_csv(self, frame):
+        # Waits while generate_data.py / compaction.py rewrite the file (see DataFileLock)
+        with DataFileLock(self.data_file):
+            exists = os.path.exists(self.data_file) and os.path.getsize(self.data_file) > 0
+            if exists:
+                with open(self.data_file, newline="") as f:
+                    header = f.readline().strip().split(",")
+                frame = frame.reindex(columns=header)
+            frame.to_csv(self.data_file, mode="a", header=not exists, index=False)
+
+    def _index(self, frame):
+        if self._collection is None and not os.path.exists(self.store_dir):
+            # PersistentClient would create an empty store here, and query_app.py
+            # would then load it instead of building the full index from the CSV.
+            if not self._warned_no_store:
+                print(f"⚠️ {self.store_dir} doesn't exist yet — skipping vector index updates until "
+                      "query_app.py builds it (rows are still in the CSV and will be indexed then)")
+                self._warned_no_store = True
+            return
+        try:
+            if self._collection is None:
+                import chromadb
+                from langchain_community.embeddings import HuggingFaceEmbeddings
+                from bulk_index import COLLECTION_NAME, EMBED_MODEL
+
+                self._embeddings = HuggingFaceEmbeddings(model_name=EMBED_MODEL)
+                self._collection = chromadb.PersistentClient(path=self.store_dir).get_or_create_collection(COLLECTION_NAME)
+
+            from bulk_index import row_to_text
+            records = frame.astype(str).to_dict("records")
+            texts = [row_to_text(r) for r in records]
+            self._collection.upsert(
+                ids=self._doc_ids(records),
+                documents=texts,
+                metadatas=[{"source": self.data_file, "transaction_id": r["transaction_id"]} for r in records],
+                embeddings=self._embeddings.embed_documents(texts),
+            )
+        except Exception as e:
+            print(f"⚠️ Vector index update failed (rows are still in the CSV): {e}")
+
+    def _doc_ids(self, records):
+        """One document ID per row; repeated transaction_ids get ~2, ~3... like bulk_index."""
+        from bulk_index import row_doc_id, unique_doc_ids
+
+        ids = [row_doc_id(self.data_file, r, None) for r in records]
+        unseen = [i for i in dict.fromkeys(ids) if i not in self._seen_ids]
+        if unseen:
+            # IDs written by an earlier ingest run are only known to the store
+            for doc_id in self._collection.get(ids=unseen, include=[])["ids"]:
+                n = 1
+                while self._collection.get(ids=[f"{doc_id}~{n + 1}"], include=[])["ids"]:
+                    n += 1
+                self._seen_ids[doc_id] = n
+        return unique_doc_ids(ids, self._seen_ids)
+
+
+# =========================
+# 📡 Sources
+# =========================
+def read_stream(stream, writer):
+    for line in stream:
+        writer.submit_line(line)
+
+
+def follow_file(path, writer, poll=0.2):
+    """Read a file and keep following appended lines, like tail -f."""
+    with open(path) as f:
+        buffered = ""
+        while True:
+            chunk = f.readline()
+            if not chunk:
+                time.sleep(poll)
+                continue
+            buffered += chunk
+            if buffered.endswith("\n"):
+                writer.submit_line(buffered)
+                buffered = ""
+
+
+def serve(server_cls, address, writer):
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                writer.submit_line(raw.decode("utf-8", errors="replace"))
+
+    class Server(server_cls):
+        daemon_threads = True
+
+    with Server(address, Handler) as server:
+        print(f"📡 Listening on {address}")
+        server.serve_forever()
+
+
+# =========================
+# 👀 Incremental reader
+# =========================
+class CsvTail:
+    """Read only the rows appended to a CSV since the last call.
+
+    If the file was rewritten (e.g. by generate_data.py) instead of appended
+    to, read_new() returns None and the caller should reload it fully.
+    Calls are serialized, so threads sharing a tail never read a row twice.
+    """
+
+    def __init__(self, path, parse_dates=("date_time",)):
+        self.path = path
+        self.parse_dates = list(parse_dates)
+        self.offset = 0
+        self.columns = None
+        self._marker = b""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Mark the current end of file as read."""
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        if not os.path.exists(self.path):
+            self.offset, self.columns, self._marker = 0, None, b""
+            return
+        with open(self.path, "rb") as f:
+            self.columns = f.readline().decode("utf-8").strip().split(",")
+            f.seek(0, os.SEEK_END)
+            self.offset = f.tell()
+            self._marker = self._tail_bytes(f, self.offset)
+
+    @staticmethod
+    def _tail_bytes(f, offset, n=64):
+        start = max(0, offset - n)
+        f.seek(start)
+        return f.read(offset - start)
+
+    def read_all(self):
+        """Whole file as a DataFrame; later read_new() calls continue from here."""
+        with self._lock:
+            self._reset()
+            with open(self.path, "rb") as f:
+                data = f.read(self.offset)
+                complete = data.rfind(b"\n") + 1  # a half-written last line is left for read_new()
+                if 0 < complete < self.offset:
+                    data, self.offset = data[:complete], complete
+                    self._marker = self._tail_bytes(f, complete)
+        return pd.read_csv(io.BytesIO(data), parse_dates=self.parse_dates)
+
+    def read_new(self):
+        """DataFrame of appended rows (possibly empty), or None after a rewrite."""
+        with self._lock:
+            return self._read_new()
+
+    def _read_new(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size < self.offset or self._tail_bytes(f, self.offset) != self._marker:
+                return None
+            if size == self.offset:
+                return pd.DataFrame(columns=self.columns)
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+
+        complete = data.rfind(b"\n") + 1  # leave a half-written last line for next time
+        if complete == 0:
+            return pd.DataFrame(columns=self.columns)
+        self.offset += complete
+        with open(self.path, "rb") as f:
+            self._marker = self._tail_bytes(f, self.offset)
+        return pd.read_csv(io.BytesIO(data[:complete]), names=self.columns, header=None,
+                           parse_dates=self.parse_dates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest JSON-lines transaction events in micro-batches")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="JSON-lines file to follow, or - for stdin/pipe")
+    source.add_argument("--socket", help="unix socket path to listen on")
+    source.add_argument("--tcp", type=int, help="TCP port to listen on (127.0.0.1 only)")
+    parser.add_argument("--batch-size", type=int, default=200, help="flush after this many events")
+    parser.add_argument("--max-wait", type=float, default=2.0, help="flush after this many seconds")
+    parser.add_argument("--max-pending", type=int, default=10000, help="buffered events before readers block")
+    parser.add_argument("--no-index", action="store_true", help="skip vector store updates")
+    args = parser.parse_args()
+
+    writer = MicroBatchWriter(batch_size=args.batch_size, max_wait=args.max_wait,
+                              max_pending=args.max_pending, index=not args.no_index)
+    flusher = threading.Thread(target=writer.run)
+    flusher.start()
+
+    try:
+        if args.file == "-":
+            read_stream(sys.stdin, writer)
+        elif args.file:
+            follow_file(args.file, writer)
+        elif args.socket:
+            if os.path.exists(args.socket):
+                os.remove(args.socket)
+            serve(socketserver.ThreadingUnixStreamServer, args.socket, writer)
+        else:
+            serve(socketserver.ThreadingTCPServer, ("127.0.0.1", args.tcp), writer)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.stop()
+        flusher.join()
+        print(f"✅ Ingest stopped: {writer.written:,} written, {writer.rejected} rejected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# =========================
+# llm_backend.py (Pluggable LLM backends)
+# =========================
+#
+# Selected with the LLM_BACKEND setting (Streamlit secret or env var):
+#   gemini    → live GoogleGenerativeAI (default)
+#   record    → live Gemini, every prompt/response pair appended to LLM_RECORD_FILE
+#   replay    → answers served from LLM_RECORD_FILE, no network
+#   synthetic → fake answers with configurable latency and token rate, no network
+#
+# Every backend exposes .invoke(prompt) -> str, the only LLM call run_query makes.
+
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+
+DEFAULT_BACKEND = "gemini"
+DEFAULT_RECORD_FILE = "llm_recordings.jsonl"
+GEMINI_MODEL = "gemini-1.5-flash"
+
+
+def prompt_key(prompt: str) -> str:
+    """Stable key for a prompt (used to match recordings on replay)."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def _as_text(result) -> str:
+    """LLMs return str, chat models return a message; normalise to text."""
+    if isinstance(result, str):
+        return result
+    return getattr(result, "content", str(result))
+
+
+class RecordingLLM:
+    """Wrap a live LLM and append each prompt/response pair to a JSONL file."""
+
+    def __init__(self, llm, path: str = DEFAULT_RECORD_FILE):
+        self.llm = llm
+        self.path = path
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt: str) -> str:
+        started = time.perf_counter()
+        response = _as_text(self.llm.invoke(prompt))
+        record = {
+            "key": prompt_key(prompt),
+            "prompt": prompt,
+            "response": response,
+            "latency_s": round(time.perf_counter() - started, 4),
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return response
+
+
+class ReplayLLM:
+    """Serve recorded responses deterministically.
+
+    An exact prompt match returns its recorded response. A miss either raises
+    (strict=True) or returns a recording picked by the prompt hash, so the same
+    prompt always gets the same answer. With replay_latency=True the recorded
+    latency is slept as well, to keep load tests realistic.
+    """
+
+    def __init__(self, path: str = DEFAULT_RECORD_FILE, strict: bool = False, replay_latency: bool = False):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"❌ No LLM recordings found at {path} — run with LLM_BACKEND=record first.")
+        self.path = path
+        self.strict = strict
+        self.replay_latency = replay_latency
+        self.records = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    self.records[record["key"]] = record
+        if not self.records:
+            raise ValueError(f"❌ LLM recordings file {path} is empty.")
+        self._ordered = [self.records[k] for k in sorted(self.records)]
+        self.hits = 0
+        self.misses = 0
+
+    def invoke(self, prompt: str) -> str:
+        key = prompt_key(prompt)
+        record = self.records.get(key)
+        if record is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            if self.strict:
+                raise KeyError(f"No recorded response for prompt {key[:12]}")
+            record = self._ordered[int(key, 16) % len(self._ordered)]
+        if self.replay_latency:
+            time.sleep(record.get("latency_s", 0))
+        return record["response"]
+
+
+class SyntheticLLM:
+    """Generate fake answers offline with a simulated latency profile.
+
+    Latency = first_token_ms + tokens / tokens_per_sec (plus optional jitter),
+    which roughly matches how a hosted model streams a completion.
+    """
+
+    WORDS = ["sales", "branch", "policy", "refund", "customer", "total", "category",
+             "employee", "transactions", "today", "report", "store", "items", "week"]
+
+    def __init__(self, first_token_ms: float = 300, tokens_per_sec: float = 80,
+                 tokens: int = 120, jitter: float = 0.1):
+        self.first_token_ms = first_token_ms
+        self.tokens_per_sec = tokens_per_sec
+        self.tokens = tokens
+        self.jitter = jitter
+
+    def invoke(self, prompt: str) -> str:
+        # Seed from the prompt so the same question gives the same answer
+        rng = random.Random(prompt_key(prompt))
+        latency = self.first_token_ms / 1000 + self.tokens / max(self.tokens_per_sec, 1e-6)
+        if self.jitter:
+            latency *= 1 + rng.uniform(-self.jitter, self.jitter)
+        time.sleep(max(latency, 0))
+        body = " ".join(rng.choice(self.WORDS) for _ in range(self.tokens))
+        return f"📝 **Answer:** (Synthetic) {body}"
+
+
+def _setting(key: str, default=None, get_secret=None):
+    value = get_secret(key) if get_secret else None
+    return value if value not in (None, "") else os.getenv(key, default)
+
+
+def make_gemini_llm(api_key):
+    """Live Gemini model, or None if the package or key is missing."""
+    try:
+        from langchain_google_genai import GoogleGenerativeAI
+    except Exception:
+        return None
+    if not api_key:
+        return None
+    return GoogleGenerativeAI(model=GEMINI_MODEL, google_api_key=api_key)
+
+
+def get_llm(api_key=None, get_secret=None):
+    """Build the LLM backend chosen by LLM_BACKEND.
+
+    Returns (llm, backend_name). llm is None when the live backend is
+    requested but unavailable, so callers keep their retrieval-only fallback.
+    """
+    backend = str(_setting("LLM_BACKEND", DEFAULT_BACKEND, get_secret)).lower()
+    record_file = _setting("LLM_RECORD_FILE", DEFAULT_RECORD_FILE, get_secret)
+
+    if backend == "replay":
+        strict = str(_setting("LLM_REPLAY_STRICT", "0", get_secret)).lower() in ("1", "true", "yes")
+        latency = str(_setting("LLM_REPLAY_LATENCY", "0", get_secret)).lower() in ("1", "true", "yes")
+        return ReplayLLM(record_file, strict=strict, replay_latency=latency), backend
+
+    if backend == "synthetic":
+        return SyntheticLLM(
+            first_token_ms=float(_setting("LLM_SYNTH_FIRST_TOKEN_MS", 300, get_secret)),
+            tokens_per_sec=float(_setting("LLM_SYNTH_TOKENS_PER_SEC", 80, get_secret)),
+            tokens=int(_setting("LLM_SYNTH_TOKENS", 120, get_secret)),
+            jitter=float(_setting("LLM_SYNTH_JITTER", 0.1, get_secret)),
+        ), backend
+
+    if backend not in ("gemini", "record"):
+        raise ValueError(f"Unknown LLM_BACKEND '{backend}' (use gemini, record, replay or synthetic)")
+
+    llm = make_gemini_llm(api_key)
+    if llm is not None and backend == "record":
+        return RecordingLLM(llm, record_file), backend
+    return llm, backend
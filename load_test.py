@@ -0,0 +1,67 @@
+# =========================
+# load_test.py (Offline throughput test for run_query)
+# =========================
+#
+# Drives many concurrent questions through the real run_query pipeline.
+# Run it with an offline LLM backend so no API calls are made, e.g.:
+#   LLM_BACKEND=synthetic python load_test.py --queries 2000 --workers 64
+#   LLM_BACKEND=replay    python load_test.py --queries 2000 --workers 64
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+QUESTIONS = [
+    "What is the refund policy?",
+    "How many leave days do employees get?",
+    "Which products sold best at BCH-004?",
+    "Show transactions handled by EMP-001-002",
+    "What is the discount policy for employees?",
+    "Which category had the highest sales?",
+    "What did customers say about Dairy products?",
+    "What are the exchange rules for damaged items?",
+]
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for run_query")
+    parser.add_argument("--queries", type=int, default=500, help="total questions to send")
+    parser.add_argument("--workers", type=int, default=32, help="concurrent threads")
+    args = parser.parse_args()
+
+    from query_app import run_query, LLM_BACKEND
+
+    def one(i):
+        started = time.perf_counter()
+        try:
+            run_query(QUESTIONS[i % len(QUESTIONS)])
+            ok = True
+        except Exception as e:
+            print("⚠️ Query failed:", e)
+            ok = False
+        return time.perf_counter() - started, ok
+
+    print(f"🚀 Sending {args.queries} queries with {args.workers} workers (LLM backend: {LLM_BACKEND})")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(one, range(args.queries)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [r[0] for r in results]
+    failures = sum(1 for r in results if not r[1])
+    print(f"✅ Done in {elapsed:.2f}s — {args.queries / elapsed:,.1f} queries/sec, {failures} failed")
+    print(f"⏱️ Latency mean {statistics.mean(latencies) * 1000:.0f} ms | "
+          f"p50 {_percentile(latencies, 50) * 1000:.0f} ms | "
+          f"p95 {_percentile(latencies, 95) * 1000:.0f} ms | "
+          f"p99 {_percentile(latencies, 99) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
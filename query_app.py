@@ -5,48 +5,48 @@
 import os
 import sys
 import subprocess
+import threading
 import pandas as pd
-import streamlit as st
-from dotenv import load_dotenv
 from datetime import datetime, timedelta
 
+from startup_profiler import step
+
 # Patch sqlite3 for Chroma on Streamlit Cloud
-try:
-    import pysqlite3
-    sys.modules["sqlite3"] = sys.modules.pop("pysqlite3")
-except Exception as e:
-    print("SQLite patching failed:", e)
-
-from langchain_community.document_loaders import TextLoader, CSVLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain.prompts import PromptTemplate
-from langchain.agents import AgentExecutor, create_react_agent
-from langchain.tools.retriever import create_retriever_tool
-from langchain_experimental.tools.python.tool import PythonREPLTool
-from langchain.tools import Tool
+with step("patch sqlite3"):
+    try:
+        import pysqlite3
+        sys.modules["sqlite3"] = sys.modules.pop("pysqlite3")
+    except Exception as e:
+        print("SQLite patching failed:", e)
+
+with step("langchain", "import"):
+    from langchain_community.document_loaders import TextLoader, CSVLoader
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from langchain_community.vectorstores import Chroma
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    from langchain.prompts import PromptTemplate
+    from langchain.agents import AgentExecutor, create_react_agent
+    from langchain.tools.retriever import create_retriever_tool
+    from langchain.tools import Tool
+
+with step("langchain_experimental", "import"):
+    from langchain_experimental.tools.python.tool import PythonREPLTool
+
+from llm_backend import get_llm
+from settings import get_secret
+from compaction import load_daily_sales, merge_daily_sales
+from ingest import CsvTail
+from session_memory import CANDIDATE_K
 
 # ✅ Optional import of GoogleGenerativeAI
-try:
-    from langchain_google_genai import GoogleGenerativeAI
-    HAS_GOOGLE_GENAI = True
-except Exception:
-    GoogleGenerativeAI = None
-    HAS_GOOGLE_GENAI = False
-    print("⚠️ Warning: langchain_google_genai not available; running in retrieval-only mode.")
-
-# --- Secrets handler ---
-load_dotenv()  # for local .env
-
-def get_secret(key: str):
-    """Check Streamlit secrets first (Cloud), else fallback to .env/env vars (local)."""
+with step("langchain_google_genai", "import"):
     try:
-        if hasattr(st, "secrets") and key in st.secrets:
-            return st.secrets[key]
+        from langchain_google_genai import GoogleGenerativeAI
+        HAS_GOOGLE_GENAI = True
     except Exception:
-        pass
-    return os.getenv(key)
+        GoogleGenerativeAI = None
+        HAS_GOOGLE_GENAI = False
+        print("⚠️ Warning: langchain_google_genai not available; running in retrieval-only mode.")
 
 GOOGLE_API_KEY = get_secret("GOOGLE_API_KEY")
 
@@ -58,74 +58,102 @@ print("📂 Using data file:", DATA_FILE)
 
 today = datetime.now().date()
 
-# Load dataset if exists
-df = None
-if os.path.exists(DATA_FILE):
-    try:
-        df = pd.read_csv(DATA_FILE, parse_dates=["date_time"])
+# Rows appended by ingest.py are picked up incrementally before each query.
+# df is loaded through the same tail, so nothing appended after the initial
+# load is skipped.
+data_tail = CsvTail(DATA_FILE)
+# Streamlit runs sessions in threads; without this, two queries could both
+# read the same appended rows and merge them into df/daily_df twice.
+_refresh_lock = threading.Lock()
+
+with step("load CSV + daily rollup"):
+    # Load dataset if exists
+    df = None
+    if os.path.exists(DATA_FILE):
+        try:
+            df = data_tail.read_all()
+            df["date"] = df["date_time"].dt.date
+        except Exception as e:
+            print("⚠️ Error loading dataset:", e)
+
+    # ✅ Always ensure today's data exists
+    need_generate = False
+    if df is None:
+        need_generate = True
+    elif today not in df["date"].unique():
+        need_generate = True
+
+    if need_generate:
+        print("⚡ Generating fresh data for today...")
+        subprocess.run(["python", "generate_data.py"])
+        # Reload after generation
+        df = data_tail.read_all()
         df["date"] = df["date_time"].dt.date
-    except Exception as e:
-        print("⚠️ Error loading dataset:", e)
-
-# ✅ Always ensure today's data exists
-need_generate = False
-if df is None:
-    need_generate = True
-elif today not in df["date"].unique():
-    need_generate = True
-
-if need_generate:
-    print("⚡ Generating fresh data for today...")
-    subprocess.run(["python", "generate_data.py"])
-    # Reload after generation
-    df = pd.read_csv(DATA_FILE, parse_dates=["date_time"])
-    df["date"] = df["date_time"].dt.date
+
+    # Full daily history: raw rows for the recent window + summaries for older days
+    daily_df = load_daily_sales(df) if df is not None else None
+
+
+def refresh_data():
+    """Merge rows appended to DATA_FILE since the last call (full reload if it was rewritten)."""
+    global df, daily_df
+    with _refresh_lock:
+        new_rows = data_tail.read_new()
+        if new_rows is None:
+            df = data_tail.read_all()
+            df["date"] = df["date_time"].dt.date
+            daily_df = load_daily_sales(df)
+        elif not new_rows.empty:
+            new_rows["date"] = new_rows["date_time"].dt.date
+            df = pd.concat([df, new_rows], ignore_index=True)
+            daily_df = merge_daily_sales(daily_df, new_rows)
 
 # --- Initialize LLM ---
-llm = None
-if HAS_GOOGLE_GENAI and GOOGLE_API_KEY:
-    llm = GoogleGenerativeAI(
-        model="gemini-1.5-flash",
-        google_api_key=GOOGLE_API_KEY
-    )
-    print("✅ Google Generative AI initialized")
-else:
-    print("❌ No valid Google API key found — running in fallback mode")
+# LLM_BACKEND picks gemini (default), record, replay or synthetic — see llm_backend.py
+with step("init LLM backend"):
+    llm, LLM_BACKEND = get_llm(GOOGLE_API_KEY, get_secret)
+    if llm is not None:
+        print(f"✅ LLM backend initialized: {LLM_BACKEND}")
+    else:
+        print("❌ No valid Google API key found — running in fallback mode")
 
 # --- Vectorstore setup ---
-embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+with step("load embedding model"):
+    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
 
 # Transactions DB
-csv_dir = "./grocer_ai_db_csv"
-if not os.path.exists(csv_dir):
-    print("⚡ Building CSV vector DB...")
-    csv_loader = CSVLoader(file_path=DATA_FILE)
-    csv_docs = csv_loader.load()
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    csv_chunks = splitter.split_documents(csv_docs)
-    csv_store = Chroma.from_documents(csv_chunks, embeddings, persist_directory=csv_dir)
-    csv_store.persist()
-else:
-    print("✅ Loading existing CSV DB...")
-    csv_store = Chroma(persist_directory=csv_dir, embedding_function=embeddings)
-
-csv_retriever = csv_store.as_retriever(search_type="similarity", search_kwargs={"k": 5})
+with step("open transactions vector DB"):
+    csv_dir = "./grocer_ai_db_csv"
+    if not os.path.exists(csv_dir):
+        print("⚡ Building CSV vector DB...")
+        csv_loader = CSVLoader(file_path=DATA_FILE)
+        csv_docs = csv_loader.load()
+        splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+        csv_chunks = splitter.split_documents(csv_docs)
+        csv_store = Chroma.from_documents(csv_chunks, embeddings, persist_directory=csv_dir)
+        csv_store.persist()
+    else:
+        print("✅ Loading existing CSV DB...")
+        csv_store = Chroma(persist_directory=csv_dir, embedding_function=embeddings)
+
+    csv_retriever = csv_store.as_retriever(search_type="similarity", search_kwargs={"k": 5})
 
 # Policies DB
-policy_dir = "./grocer_ai_db_policies"
-if not os.path.exists(policy_dir):
-    print("⚡ Building Policies vector DB...")
-    policy_loader = TextLoader("grocer_ai_policies.txt")
-    policy_docs = policy_loader.load()
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    policy_chunks = splitter.split_documents(policy_docs)
-    policy_store = Chroma.from_documents(policy_chunks, embeddings, persist_directory=policy_dir)
-    policy_store.persist()
-else:
-    print("✅ Loading existing Policies DB...")
-    policy_store = Chroma(persist_directory=policy_dir, embedding_function=embeddings)
-
-policy_retriever = policy_store.as_retriever(search_type="similarity", search_kwargs={"k": 5})
+with step("open policies vector DB"):
+    policy_dir = "./grocer_ai_db_policies"
+    if not os.path.exists(policy_dir):
+        print("⚡ Building Policies vector DB...")
+        policy_loader = TextLoader("grocer_ai_policies.txt")
+        policy_docs = policy_loader.load()
+        splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+        policy_chunks = splitter.split_documents(policy_docs)
+        policy_store = Chroma.from_documents(policy_chunks, embeddings, persist_directory=policy_dir)
+        policy_store.persist()
+    else:
+        print("✅ Loading existing Policies DB...")
+        policy_store = Chroma(persist_directory=policy_dir, embedding_function=embeddings)
+
+    policy_retriever = policy_store.as_retriever(search_type="similarity", search_kwargs={"k": 5})
 
 # --- Prompt template ---
 prompt = PromptTemplate.from_template("""
@@ -184,9 +212,10 @@ tools = [
 ]
 
 # --- Agent setup ---
+# The ReAct agent needs a real LangChain LLM, so it is only built for live backends
 agent_executor = None
-if HAS_GOOGLE_GENAI and llm is not None:
-    agent = create_react_agent(llm, tools, prompt)
+if HAS_GOOGLE_GENAI and llm is not None and LLM_BACKEND in ("gemini", "record"):
+    agent = create_react_agent(getattr(llm, "llm", llm), tools, prompt)
     agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
 
 # =========================
@@ -195,19 +224,23 @@ if HAS_GOOGLE_GENAI and llm is not None:
 import re
 import calendar
 
-def run_query(question: str):
+def run_query(question: str, session=None):
     """
     Handle queries:
     - Policies → grocer_ai_policies.txt
     - Transactions → grocer_ai_data.csv
     - Direct sales questions (today, yesterday, last 7 days, specific months, last year)
+
+    Pass the user's SessionMemory as `session` to let follow-up questions
+    reuse the previous retrieval instead of running a new vector search.
     """
     q_lower = question.lower()
 
     # --- Direct sales calculations ---
+    # df/daily_df are shared by all sessions: read them, never write them here
+    # (refresh_data() sets "date" on new rows under _refresh_lock)
     if df is not None:
-        df["date_time"] = pd.to_datetime(df["date_time"])
-        df["date"] = df["date_time"].dt.date
+        refresh_data()
 
         # Today
         if "sales today" in q_lower or "today's sales" in q_lower:
@@ -230,13 +263,13 @@ def run_query(question: str):
         # This year
         if "this year" in q_lower:
             this_year = datetime.now().year
-            sales_year = df[df["date"].apply(lambda d: d.year == this_year)]["total_amount"].sum()
+            sales_year = daily_df[daily_df["date"].apply(lambda d: d.year == this_year)]["total_amount"].sum()
             return f"📝 **Answer:** Total sales in {this_year} = ${sales_year:,.2f}", []
 
         # Last year
         if "last year" in q_lower:
             last_year = datetime.now().year - 1
-            sales_year = df[df["date"].apply(lambda d: d.year == last_year)]["total_amount"].sum()
+            sales_year = daily_df[daily_df["date"].apply(lambda d: d.year == last_year)]["total_amount"].sum()
             return f"📝 **Answer:** Total sales in {last_year} = ${sales_year:,.2f}", []
 
         # Specific month + year (e.g., "december 2024")
@@ -249,15 +282,12 @@ def run_query(question: str):
             start = datetime(year, month, 1).date()
             end = datetime(year, month, calendar.monthrange(year, month)[1]).date()
 
-            sales_month = df[(df["date"] >= start) & (df["date"] <= end)]["total_amount"].sum()
+            sales_month = daily_df[(daily_df["date"] >= start) & (daily_df["date"] <= end)]["total_amount"].sum()
             return f"📝 **Answer:** Total sales in {month_str.capitalize()} {year} = ${sales_month:,.2f}", []
 
 
     # --- Direct sales calculations ---
     if df is not None:
-        df["date_time"] = pd.to_datetime(df["date_time"])
-        df["date"] = df["date_time"].dt.date
-
         if "sales today" in q_lower or "today's sales" in q_lower:
             today = datetime.now().date()
             sales_today = df[df["date"] == today]["total_amount"].sum()
@@ -274,17 +304,37 @@ def run_query(question: str):
             return f"📝 **Answer:** Total sales in last 7 days = ${sales_7d:,.2f}", []
 
     # --- Retriever route ---
+    # Keywords decide the route first; a question only counts as a follow-up
+    # if it stays on the previous route.
+    keyword_route = None
     if any(word in q_lower for word in ["policy", "refund", "exchange", "leave", "guideline", "rule", "discount"]):
-        docs = policy_retriever.get_relevant_documents(question)
-        retriever_used = "GrocerAI_Policies"
+        keyword_route = "GrocerAI_Policies"
+    follow_up = session is not None and session.is_follow_up(question, keyword_route)
+    if keyword_route:
+        retriever_used = keyword_route
+    elif follow_up:
+        retriever_used = session.last_route
     else:
-        docs = csv_retriever.get_relevant_documents(question)
         retriever_used = "GrocerAI_Transactions"
+    retriever = policy_retriever if retriever_used == "GrocerAI_Policies" else csv_retriever
+    store = policy_store if retriever_used == "GrocerAI_Policies" else csv_store
+
+    if session is None:
+        docs = [getattr(d, "page_content", str(d)) for d in retriever.get_relevant_documents(question)]
+    else:
+        docs = None
+        if follow_up:
+            # "and for BCH-004?" → narrow the previous candidates when enough match
+            docs = session.narrow(question)
+            question = session.contextualize(question)
+        if docs is None:
+            docs = [d.page_content for d in store.similarity_search(question, k=CANDIDATE_K)]
+            session.remember_candidates(session.last_question if follow_up else question, retriever_used, docs)
 
-    retrieved_docs = [getattr(d, "page_content", str(d)) for d in docs[:5]]
+    retrieved_docs = docs[:5]
 
     # --- No LLM fallback ---
-    if not HAS_GOOGLE_GENAI or agent_executor is None:
+    if llm is None:
         if retrieved_docs:
             snippet = "\n\n---\n\n".join(retrieved_docs[:3])
             return f"(Fallback - {retriever_used})\n\n{snippet}", retrieved_docs
@@ -1,56 +1,90 @@
+import argparse
+
 from langchain_community.document_loaders import CSVLoader, TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import HuggingFaceEmbeddings
 
-print("📂 Loading data...")
-
-# Load CSV
-csv_loader = CSVLoader(file_path="grocer_ai_data_sample.csv")
-csv_docs = csv_loader.load()
-print(f"✅ Loaded {len(csv_docs)} CSV docs")
-
-# Load policies
-policy_loader = TextLoader(file_path="grocer_ai_policies.txt")
-policy_docs = policy_loader.load()
-print(f"✅ Loaded {len(policy_docs)} policy docs")
-
-# Debug: show sample policy text
-if policy_docs:
-    print("📑 Sample policy doc:\n", policy_docs[0].page_content[:300])
-else:
-    raise FileNotFoundError("❌ No policy docs found! Check grocer_ai_policies.txt")
-
-# Combine CSV + Policies
-all_docs = csv_docs + policy_docs
-print(f"📊 Total docs combined: {len(all_docs)}")
-
-# Split into chunks
-print("✂️ Splitting documents into chunks...")
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=1000,
-    chunk_overlap=200,
-)
-chunks = text_splitter.split_documents(all_docs)
-print(f"✅ Total chunks created: {len(chunks)}")
-
-# Create embeddings
-print("🔎 Creating embedding model...")
-embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-
-# Save into Chroma DB
-print("💾 Creating vector store...")
-vectorstore = Chroma.from_documents(
-    documents=chunks,
-    embedding=embeddings,   # ✅ works with your version
-    persist_directory="./grocer_ai_db"
-)
-
-
-print("🎉 Vector store creation complete!")
-
-# Test query
-print("\n🔍 Test search for 'refund policy':")
-docs = vectorstore.similarity_search("refund policy", k=2)
-for i, d in enumerate(docs, 1):
-    print(f"\n--- Doc {i} ---\n{d.page_content[:400]}")
+CSV_FILE = "grocer_ai_data_sample.csv"
+POLICY_FILE = "grocer_ai_policies.txt"
+PERSIST_DIR = "./grocer_ai_db"
+
+
+def build_simple(csv_file=CSV_FILE, policy_file=POLICY_FILE, persist_dir=PERSIST_DIR):
+    """Original one-shot build: load everything, split, single Chroma.from_documents call."""
+    print("📂 Loading data...")
+
+    # Load CSV
+    csv_loader = CSVLoader(file_path=csv_file)
+    csv_docs = csv_loader.load()
+    print(f"✅ Loaded {len(csv_docs)} CSV docs")
+
+    # Load policies
+    policy_loader = TextLoader(file_path=policy_file)
+    policy_docs = policy_loader.load()
+    print(f"✅ Loaded {len(policy_docs)} policy docs")
+
+    # Debug: show sample policy text
+    if policy_docs:
+        print("📑 Sample policy doc:\n", policy_docs[0].page_content[:300])
+    else:
+        raise FileNotFoundError("❌ No policy docs found! Check grocer_ai_policies.txt")
+
+    # Combine CSV + Policies
+    all_docs = csv_docs + policy_docs
+    print(f"📊 Total docs combined: {len(all_docs)}")
+
+    # Split into chunks
+    print("✂️ Splitting documents into chunks...")
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=200,
+    )
+    chunks = text_splitter.split_documents(all_docs)
+    print(f"✅ Total chunks created: {len(chunks)}")
+
+    # Create embeddings
+    print("🔎 Creating embedding model...")
+    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+
+    # Save into Chroma DB
+    print("💾 Creating vector store...")
+    vectorstore = Chroma.from_documents(
+        documents=chunks,
+        embedding=embeddings,   # ✅ works with your version
+        persist_directory=persist_dir
+    )
+
+    print("🎉 Vector store creation complete!")
+    return vectorstore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the Grocer-AI vector store")
+    parser.add_argument("--bulk", action="store_true",
+                        help="parallel, resumable build (streams the CSV, embeds on all cores, checkpoints)")
+    parser.add_argument("--csv", default=CSV_FILE, help="CSV file to index")
+    parser.add_argument("--persist-dir", default=PERSIST_DIR, help="Chroma directory")
+    parser.add_argument("--batch-size", type=int, default=512, help="rows per embedding batch (--bulk)")
+    parser.add_argument("--workers", type=int, default=None, help="embedding processes (--bulk, default: all cores)")
+    parser.add_argument("--reset", action="store_true", help="drop the store and checkpoint first (--bulk)")
+    args = parser.parse_args()
+
+    if args.bulk:
+        from bulk_index import bulk_build
+        bulk_build(args.csv, POLICY_FILE, args.persist_dir,
+                   batch_size=args.batch_size, workers=args.workers, reset=args.reset)
+        embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        vectorstore = Chroma(persist_directory=args.persist_dir, embedding_function=embeddings)
+    else:
+        vectorstore = build_simple(args.csv, POLICY_FILE, args.persist_dir)
+
+    # Test query
+    print("\n🔍 Test search for 'refund policy':")
+    docs = vectorstore.similarity_search("refund policy", k=2)
+    for i, d in enumerate(docs, 1):
+        print(f"\n--- Doc {i} ---\n{d.page_content[:400]}")
+
+
+if __name__ == "__main__":
+    main()
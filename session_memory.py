@@ -0,0 +1,123 @@
+# =========================
+# session_memory.py (Bounded conversation memory + retrieval reuse)
+# =========================
+#
+# Each Streamlit session gets a SessionMemory:
+#   - a ring buffer of the last MAX_TURNS questions/answers, with retrieved
+#     documents stored as short IDs instead of full text
+#   - the candidate set of its last vector search, so follow-ups such as
+#     "and for BCH-004?" narrow those candidates instead of searching again
+#
+# Document text lives once in the process-wide DOC_CACHE (bounded LRU), shared
+# by all sessions, so per-session memory stays small.
+
+import re
+import hashlib
+import threading
+from collections import OrderedDict, deque
+
+MAX_TURNS = 10
+CANDIDATE_K = 25  # docs fetched per search, kept for narrowing follow-ups
+MIN_NARROW_MATCHES = 5  # fewer matching candidates → run a fresh search instead
+DOC_CACHE_SIZE = 5000
+
+FOLLOW_UP_PREFIXES = ("and ", "what about", "how about", "also ", "same for", "only ", "just ")
+_ENTITY_RE = re.compile(r"\b[A-Za-z]{2,5}-\d+(?:-\d+)*\b|\b\d{4}-\d{2}-\d{2}\b")
+_STOPWORDS = {"and", "what", "about", "how", "for", "also", "same", "only", "just", "the", "that", "with", "then"}
+
+
+class DocCache:
+    """Thread-safe LRU of document text keyed by a short content hash."""
+
+    def __init__(self, max_size=DOC_CACHE_SIZE):
+        self.max_size = max_size
+        self._docs = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def doc_id(text):
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+    def put(self, text):
+        doc_id = self.doc_id(text)
+        with self._lock:
+            self._docs[doc_id] = text
+            self._docs.move_to_end(doc_id)
+            while len(self._docs) > self.max_size:
+                self._docs.popitem(last=False)
+        return doc_id
+
+    def get(self, doc_id):
+        with self._lock:
+            text = self._docs.get(doc_id)
+            if text is not None:
+                self._docs.move_to_end(doc_id)
+            return text
+
+
+DOC_CACHE = DocCache()
+
+
+class SessionMemory:
+    """Per-session conversation history and retrieval cache."""
+
+    def __init__(self, max_turns=MAX_TURNS, doc_cache=DOC_CACHE):
+        self.turns = deque(maxlen=max_turns)
+        self.doc_cache = doc_cache
+        self.last_question = None
+        self.last_route = None
+        self.candidate_ids = []
+
+    # --- Conversation history ---
+    def add_turn(self, question, answer, docs):
+        self.turns.append({"q": question, "a": answer, "doc_ids": [self.doc_cache.put(d) for d in docs]})
+
+    def docs(self, turn):
+        """Text of a turn's documents that are still cached."""
+        return [t for t in (self.doc_cache.get(i) for i in turn["doc_ids"]) if t is not None]
+
+    def clear(self):
+        self.turns.clear()
+        self.last_question = None
+        self.last_route = None
+        self.candidate_ids = []
+
+    # --- Retrieval reuse ---
+    def is_follow_up(self, question, route=None):
+        """True for explicit follow-ups ("and for BCH-004?", "what about Dairy?")
+        or a bare ID/date, as long as the question doesn't point to a different
+        route. `route` is the route the question's own keywords select, if any."""
+        if not self.candidate_ids or (route is not None and route != self.last_route):
+            return False
+        q = question.strip().lower()
+        bare_entity = len(q.split()) <= 2 and bool(_ENTITY_RE.search(question))
+        return q.startswith(FOLLOW_UP_PREFIXES) or bare_entity
+
+    def contextualize(self, question):
+        """Question for search / the LLM: a follow-up carries the previous question along."""
+        if self.last_question:
+            return f"{self.last_question} (follow-up: {question})"
+        return question
+
+    def narrow(self, question):
+        """Previous candidates matching the follow-up's IDs/dates/keywords, or None.
+
+        None (too few matches) means the cached candidates can't answer the
+        follow-up and a fresh vector search is needed.
+        """
+        terms = _ENTITY_RE.findall(question)
+        if not terms:
+            terms = [w for w in re.findall(r"\w+", question.lower()) if len(w) > 3 and w not in _STOPWORDS]
+        if not terms:
+            return None
+        matches = []
+        for doc_id in self.candidate_ids:
+            text = self.doc_cache.get(doc_id)
+            if text is not None and all(t.lower() in text.lower() for t in terms):
+                matches.append(text)
+        return matches if len(matches) >= MIN_NARROW_MATCHES else None
+
+    def remember_candidates(self, question, route, docs):
+        self.last_question = question
+        self.last_route = route
+        self.candidate_ids = [self.doc_cache.put(d) for d in docs[:CANDIDATE_K]]
@@ -0,0 +1,22 @@
+# =========================
+# settings.py (Secrets / config lookup)
+# =========================
+# Kept free of heavy imports so every page can read settings without
+# loading the AI backend.
+
+import os
+
+import streamlit as st
+from dotenv import load_dotenv
+
+load_dotenv()  # for local .env
+
+
+def get_secret(key: str):
+    """Check Streamlit secrets first (Cloud), else fallback to .env/env vars (local)."""
+    try:
+        if hasattr(st, "secrets") and key in st.secrets:
+            return st.secrets[key]
+    except Exception:
+        pass
+    return os.getenv(key)
@@ -0,0 +1,135 @@
+# =========================
+# startup_profiler.py (Startup timings + cold-start budget check)
+# =========================
+#
+# app.py and query_app.py wrap their imports and init steps in
+# `with startup_profiler.step("..."):`, so a cold start can be broken down
+# like `python -X importtime`, but including our own steps (CSV load, vector
+# stores, LLM init...). Steps are only recorded during the first script run.
+#
+#   python startup_profiler.py --page dashboard            # profile one page's cold start
+#   python startup_profiler.py --page assistant --importtime  # plus the slowest imports
+#   python startup_profiler.py --page forecasts --budget 8  # exit 1 if over 8 seconds
+#
+# The budget defaults to STARTUP_BUDGET_SECONDS (env var) or 10 seconds.
+# Set GROCER_PROFILE=1 to show the profile in the app's sidebar.
+
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+PAGES = {"assistant": "🤖 AI Assistant", "dashboard": "📊 Daily Dashboard", "forecasts": "🔮 Forecasts"}
+DEFAULT_BUDGET_SECONDS = 10.0
+_MARKER = "STARTUP_PROFILE "
+
+STEPS = []
+_started = time.perf_counter()
+_depth = 0
+_recording = True
+_total = None
+
+
+@contextlib.contextmanager
+def step(name, kind="init"):
+    """Time a block (kind is "import" or "init"); nested steps are indented in the report."""
+    global _depth
+    if not _recording:
+        yield
+        return
+    start = time.perf_counter()
+    entry = {"step": name, "kind": kind, "depth": _depth, "at": start - _started}
+    STEPS.append(entry)
+    _depth += 1
+    try:
+        yield
+    finally:
+        _depth -= 1
+        entry["seconds"] = time.perf_counter() - start
+
+
+def finish():
+    """Stop recording (call at the end of every script run) and return the first run's total."""
+    global _recording, _total
+    if _total is None:
+        _recording = False
+        _total = time.perf_counter() - _started
+    return _total
+
+
+def report(steps=None):
+    lines = [f"{'seconds':>8}  {'kind':<6}  step"]
+    for s in steps if steps is not None else STEPS:
+        lines.append(f"{s.get('seconds', 0):8.3f}  {s['kind']:<6}  {'  ' * s['depth']}{s['step']}")
+    return "\n".join(lines)
+
+
+def _slowest_imports(stderr, top=15):
+    """Parse `-X importtime` output into the slowest (cumulative) imports."""
+    rows = []
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            parts = [p.strip() for p in line[len("import time:"):].split("|")]
+            if parts[1].isdigit():
+                rows.append((int(parts[1]) / 1e6, parts[2].strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def _child(page):
+    """Run one cold start of app.py headless on `page` and print the recorded steps."""
+    from streamlit.testing.v1 import AppTest
+    import startup_profiler  # the module app.py records into (this file runs as __main__)
+
+    os.environ["GROCER_START_PAGE"] = page
+    app = AppTest.from_file("app.py", default_timeout=600)
+    app.run()
+    failures = [e.value for e in app.exception]
+    print(_MARKER + json.dumps({"steps": startup_profiler.STEPS, "errors": failures}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile app.py cold start")
+    parser.add_argument("--page", choices=sorted(PAGES), default="assistant")
+    parser.add_argument("--budget", type=float,
+                        default=float(os.getenv("STARTUP_BUDGET_SECONDS", DEFAULT_BUDGET_SECONDS)),
+                        help="fail (exit 1) if the cold start takes longer than this")
+    parser.add_argument("--importtime", action="store_true", help="also list the slowest imports")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.page)
+        return
+
+    cmd = [sys.executable] + (["-X", "importtime"] if args.importtime else []) + \
+          [os.path.abspath(__file__), "--child", "--page", args.page]
+    started = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    total = time.perf_counter() - started
+
+    payload = next((json.loads(l[len(_MARKER):]) for l in proc.stdout.splitlines() if l.startswith(_MARKER)), None)
+    if payload is None:
+        print(proc.stdout[-2000:], proc.stderr[-2000:])
+        print("❌ Startup run failed")
+        sys.exit(1)
+
+    print(f"⏱️ Cold start of '{PAGES[args.page]}': {total:.2f}s (budget {args.budget:.2f}s)\n")
+    print(report(payload["steps"]))
+    if args.importtime:
+        print("\n🐢 Slowest imports (cumulative):")
+        for seconds, module in _slowest_imports(proc.stderr):
+            print(f"{seconds:8.3f}  {module}")
+    for error in payload["errors"]:
+        print("⚠️ App error:", error)
+
+    if total > args.budget:
+        print(f"\n❌ Cold start over budget by {total - args.budget:.2f}s")
+        sys.exit(1)
+    print("\n✅ Within budget")
+
+
+if __name__ == "__main__":
+    main()